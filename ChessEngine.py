@@ -0,0 +1,850 @@
+'''A searching chess engine built on ChessObjects. Positions are copied out of a chessGame into a lightweight Position
+object (a list of 64 piece letters) so that the search can make and unmake moves without deepcopying the board.'''
+import random
+import re
+import threading
+import time
+
+import ChessObjects as co
+import ChessEvaluation as ev
+
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000     # Scores beyond this are mate scores.
+INFINITY = 1000000
+
+exchangeValues = {'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 900, 'k': 20000}    # The king is never worth trading.
+
+# Search features that can be switched off (eg. Engine(options = {'killers': False})) to measure their effect.
+defaultOptions = {
+    'mvvLva': True,     # order captures by most valuable victim, then least valuable attacker
+    'see': True,        # order captures that lose material (by static exchange evaluation) after quiet moves
+    'killers': True,    # try quiet moves that caused a cutoff at the same ply earlier
+    'history': True,    # order remaining quiet moves by how often they caused cutoffs
+    'quiescence': True,         # search captures and promotions past the horizon until the position is quiet
+    'nullMove': True,           # prune when passing the move still fails high (not in check or with few pieces left)
+    'lmr': True,                # search late quiet moves to a reduced depth first
+    'checkExtensions': True,    # search one ply deeper when the side to move is in check
+    'pawnStructure': True,      # score doubled, isolated and passed pawns and the pawn shelter in front of each king
+    'evalCache': True,          # cache evaluations by position hash and pawn terms by pawn hash
+    'debugEval': False, # check the incrementally updated evaluation against a full evaluation at every leaf
+}
+evaluationOptions = ['pawnStructure']     # Options that change evaluation scores, so cached scores are cleared with them.
+# The clock and stop event are checked every (clockCheckMask + 1) nodes: about every 5-20 ms at this engine's speed.
+clockCheckMask = 63
+nullMoveMinPhase = 3    # Null-move pruning is skipped in endgames below this phase, where zugzwang is common.
+
+# Zobrist keys. A fixed seed keeps hashes identical between processes and runs.
+zobristRandom = random.Random(20240601)
+zobristPieces = {letter: [zobristRandom.getrandbits(64) for index in range(64)] for letter in 'KQRBNPkqrbnp'}
+zobristBlackToMove = zobristRandom.getrandbits(64)
+zobristCastling = {right: zobristRandom.getrandbits(64) for right in 'KQkq'}
+zobristEnPassant = [zobristRandom.getrandbits(64) for fileIdx in range(8)]
+
+# Castling rights lost when a piece moves from or to each of these squares.
+castlingLost = {0: 'Q', 4: 'KQ', 7: 'K', 56: 'q', 60: 'kq', 63: 'k'}
+
+class Position:
+    '''A position that can make and unmake moves in place. Takes a list of 64 piece letters (see
+    ChessObjects.boardToLetters), and optional 'toMove', 'castling', 'epIndex' and 'halfmoveClock' arguments.
+    Use Position.fromGame() or Position.fromFEN() to create one from a chessGame or a FEN string.'''
+    def __init__(self, letters, toMove = 'white', castling = '-', epIndex = None, halfmoveClock = 0):
+        self.letters = letters
+        self.toMove = toMove
+        self.castling = castling
+        self.epIndex = epIndex
+        self.halfmoveClock = halfmoveClock
+        self.kingIndex = {color: letters.index(co.pieceLettersByColor[color][0])
+                          if co.pieceLettersByColor[color][0] in letters else None for color in ['white', 'black']}
+        self.hash = self.computeHash()
+        self.pawnHash = self.computePawnHash()
+        self.history = []   # Hashes of the positions before each move made, for repetition detection.
+        # Piece-square evaluation terms (see ChessEvaluation), updated by makeMove() and unmakeMove().
+        self.middlegameScore, self.endgameScore, self.phase = ev.evaluateFromScratch(letters)
+
+    @classmethod
+    def fromGame(cls, game: co.chessGame):
+        '''Takes a chessGame and returns a Position for its current position.'''
+        lastMove = game.movesObjects[-1] if game.movesObjects != [] else None
+        return cls(co.boardToLetters(game.board), game.toMove, co.castlingRights(game.board),
+                   co.enPassantIndex(lastMove), game.FiftyMoveCount)
+
+    @classmethod
+    def fromFEN(cls, fen):
+        '''Takes a full FEN string and returns a Position.'''
+        return cls.fromGame(co.gameFromFEN(fen))
+
+    def copy(self):
+        '''Returns an independent copy of the position (including its repetition history).'''
+        position = Position(self.letters[:], self.toMove, self.castling, self.epIndex, self.halfmoveClock)
+        position.history = self.history[:]
+        return position
+
+    def computeHash(self):
+        '''Computes the Zobrist hash of the position from scratch.'''
+        positionHash = 0
+        for index, piece in enumerate(self.letters):
+            if piece is not None:
+                positionHash ^= zobristPieces[piece][index]
+        if self.toMove == 'black':
+            positionHash ^= zobristBlackToMove
+        for right in self.castling:
+            if right != '-':
+                positionHash ^= zobristCastling[right]
+        if self.epIndex is not None:
+            positionHash ^= zobristEnPassant[self.epIndex % 8]
+        return positionHash
+
+    def computePawnHash(self):
+        '''Computes the Zobrist hash of the pawns alone from scratch (keys the pawn hash table).'''
+        pawnHash = 0
+        for index, piece in enumerate(self.letters):
+            if piece == 'P' or piece == 'p':
+                pawnHash ^= zobristPieces[piece][index]
+        return pawnHash
+
+    def evaluate(self):
+        '''Returns the piece-square evaluation in centipawns from the point of view of the player to move.'''
+        score = ev.taperedScore(self.middlegameScore, self.endgameScore, self.phase)
+        return score if self.toMove == 'white' else -score
+
+    def legalMoves(self):
+        '''Returns a list of all legal moves for the player to move in UCI format.'''
+        return co.generateLegalMoves(self.letters, self.toMove, self.castling, self.epIndex)
+
+    def inCheck(self):
+        '''Returns a Boolean value stating whether the player to move is in check.'''
+        kingIndex = self.kingIndex[self.toMove]
+        return kingIndex is not None and co.isSquareAttacked(self.letters, kingIndex, co.opponentColor[self.toMove])
+
+    def isRepetition(self):
+        '''Returns a Boolean value stating whether the position has occurred before since the last capture or pawn move.'''
+        return self.hash in self.history[max(0, len(self.history) - self.halfmoveClock):]
+
+    def isCapture(self, UCImove):
+        '''Returns a Boolean value stating whether a move captures a piece (including en passant).'''
+        toIdx = co.squareIndex(UCImove[2:4])
+        return self.letters[toIdx] is not None or (toIdx == self.epIndex and self.letters[co.squareIndex(UCImove[:2])] in 'Pp')
+
+    def makeMove(self, UCImove):
+        '''Plays a legal move on the position and returns the information needed to undo it with .unmakeMove().'''
+        letters = self.letters
+        fromIdx = co.squareIndex(UCImove[:2])
+        toIdx = co.squareIndex(UCImove[2:4])
+        piece = letters[fromIdx]
+        capturedIdx = toIdx
+        if piece in 'Pp' and toIdx == self.epIndex:
+            capturedIdx = toIdx - 8 if piece == 'P' else toIdx + 8
+        captured = letters[capturedIdx]
+        letters[capturedIdx] = None
+        undo = (UCImove, piece, captured, capturedIdx, self.castling, self.epIndex, self.halfmoveClock, self.hash,
+                self.middlegameScore, self.endgameScore, self.phase, self.pawnHash)
+
+        positionHash = self.hash ^ zobristBlackToMove
+        if self.epIndex is not None:
+            positionHash ^= zobristEnPassant[self.epIndex % 8]
+        if captured is not None:
+            positionHash ^= zobristPieces[captured][capturedIdx]
+            self.middlegameScore -= ev.middlegameScores[captured][capturedIdx]
+            self.endgameScore -= ev.endgameScores[captured][capturedIdx]
+            self.phase -= ev.piecePhase[captured]
+            if captured == 'P' or captured == 'p':
+                self.pawnHash ^= zobristPieces[captured][capturedIdx]
+
+        placedPiece = piece
+        if len(UCImove) > 4:
+            placedPiece = UCImove[4].upper() if piece == 'P' else UCImove[4]
+            self.phase += ev.piecePhase[placedPiece]
+        letters[fromIdx] = None
+        letters[toIdx] = placedPiece
+        positionHash ^= zobristPieces[piece][fromIdx] ^ zobristPieces[placedPiece][toIdx]
+        self.middlegameScore += ev.middlegameScores[placedPiece][toIdx] - ev.middlegameScores[piece][fromIdx]
+        self.endgameScore += ev.endgameScores[placedPiece][toIdx] - ev.endgameScores[piece][fromIdx]
+        if piece == 'P' or piece == 'p':
+            self.pawnHash ^= zobristPieces[piece][fromIdx]
+            if placedPiece == piece:
+                self.pawnHash ^= zobristPieces[piece][toIdx]
+
+        if piece in 'Kk':
+            self.kingIndex['white' if piece == 'K' else 'black'] = toIdx
+            if abs(toIdx - fromIdx) == 2:
+                rookFrom, rookTo = (fromIdx + 3, fromIdx + 1) if toIdx > fromIdx else (fromIdx - 4, fromIdx - 1)
+                rook = letters[rookFrom]
+                letters[rookTo] = rook
+                letters[rookFrom] = None
+                positionHash ^= zobristPieces[rook][rookFrom] ^ zobristPieces[rook][rookTo]
+                self.middlegameScore += ev.middlegameScores[rook][rookTo] - ev.middlegameScores[rook][rookFrom]
+                self.endgameScore += ev.endgameScores[rook][rookTo] - ev.endgameScores[rook][rookFrom]
+
+        if self.castling != '-' and (fromIdx in castlingLost or toIdx in castlingLost):
+            lost = castlingLost.get(fromIdx, '') + castlingLost.get(toIdx, '')
+            remaining = ''.join(right for right in self.castling if right not in lost)
+            for right in self.castling:
+                if right not in remaining:
+                    positionHash ^= zobristCastling[right]
+            self.castling = remaining if remaining else '-'
+
+        self.epIndex = None
+        if piece in 'Pp' and abs(toIdx - fromIdx) == 16:
+            self.epIndex = (fromIdx + toIdx) // 2
+            positionHash ^= zobristEnPassant[self.epIndex % 8]
+
+        self.halfmoveClock = 0 if piece in 'Pp' or captured is not None else self.halfmoveClock + 1
+        self.history.append(self.hash)
+        self.hash = positionHash
+        self.toMove = co.opponentColor[self.toMove]
+        return undo
+
+    def unmakeMove(self, undo):
+        '''Takes the value returned by .makeMove() and restores the position from before the move.'''
+        (UCImove, piece, captured, capturedIdx, self.castling, self.epIndex, self.halfmoveClock, self.hash,
+         self.middlegameScore, self.endgameScore, self.phase, self.pawnHash) = undo
+        letters = self.letters
+        fromIdx = co.squareIndex(UCImove[:2])
+        toIdx = co.squareIndex(UCImove[2:4])
+        letters[toIdx] = None
+        letters[fromIdx] = piece
+        letters[capturedIdx] = captured
+        if piece in 'Kk':
+            self.kingIndex['white' if piece == 'K' else 'black'] = fromIdx
+            if abs(toIdx - fromIdx) == 2:
+                rookFrom, rookTo = (fromIdx + 3, fromIdx + 1) if toIdx > fromIdx else (fromIdx - 4, fromIdx - 1)
+                letters[rookFrom] = letters[rookTo]
+                letters[rookTo] = None
+        self.history.pop()
+        self.toMove = co.opponentColor[self.toMove]
+
+    def hasNonPawnMaterial(self, color):
+        '''Returns a Boolean value stating whether 'color' has any piece besides its king and pawns.'''
+        queen, rook, bishop, knight = co.pieceLettersByColor[color][1:5]
+        letters = self.letters
+        return queen in letters or rook in letters or bishop in letters or knight in letters
+
+    def makeNullMove(self):
+        '''Passes the move to the opponent (used by null-move pruning) and returns the information needed to undo it
+        with .unmakeNullMove().'''
+        undo = (self.epIndex, self.halfmoveClock, self.hash)
+        positionHash = self.hash ^ zobristBlackToMove
+        if self.epIndex is not None:
+            positionHash ^= zobristEnPassant[self.epIndex % 8]
+        self.epIndex = None
+        self.halfmoveClock = 0      # Positions before a null move do not count towards repetitions.
+        self.history.append(self.hash)
+        self.hash = positionHash
+        self.toMove = co.opponentColor[self.toMove]
+        return undo
+
+    def unmakeNullMove(self, undo):
+        '''Takes the value returned by .makeNullMove() and restores the position.'''
+        self.epIndex, self.halfmoveClock, self.hash = undo
+        self.history.pop()
+        self.toMove = co.opponentColor[self.toMove]
+
+    def toFEN(self):
+        '''Returns the position as a FEN string.'''
+        ranks = []
+        for rankIdx in range(7, -1, -1):
+            rankStr = ''
+            blanks = 0
+            for piece in self.letters[8 * rankIdx: 8 * rankIdx + 8]:
+                if piece is None:
+                    blanks += 1
+                    continue
+                if blanks:
+                    rankStr += str(blanks)
+                    blanks = 0
+                rankStr += piece
+            ranks.append(rankStr + (str(blanks) if blanks else ''))
+        enPassantSquare = '-' if self.epIndex is None else co.squareName(self.epIndex)
+        return f"{'/'.join(ranks)} {self.toMove[0]} {self.castling} {enPassantSquare} {self.halfmoveClock} 1"
+
+    def moveToSAN(self, UCImove):
+        '''Takes a legal move in UCI format and returns it in standard algebraic notation (eg. 'Nf3', 'exd5', 'O-O', 'e8=Q+').'''
+        fromIdx = co.squareIndex(UCImove[:2])
+        toIdx = co.squareIndex(UCImove[2:4])
+        piece = self.letters[fromIdx]
+        if piece in 'Kk' and abs(toIdx - fromIdx) == 2:
+            san = 'O-O' if toIdx > fromIdx else 'O-O-O'
+        elif piece in 'Pp':
+            san = f'{UCImove[0]}x{UCImove[2:4]}' if self.isCapture(UCImove) else UCImove[2:4]
+            if len(UCImove) > 4:
+                san += f'={UCImove[4].upper()}'
+        else:
+            rivals = [move for move in self.legalMoves() if move[2:4] == UCImove[2:4] and move[:2] != UCImove[:2]
+                      and self.letters[co.squareIndex(move[:2])] == piece]
+            disambiguation = ''
+            if rivals:
+                if all(move[0] != UCImove[0] for move in rivals):
+                    disambiguation = UCImove[0]
+                elif all(move[1] != UCImove[1] for move in rivals):
+                    disambiguation = UCImove[1]
+                else:
+                    disambiguation = UCImove[:2]
+            capture = 'x' if self.isCapture(UCImove) else ''
+            san = f'{piece.upper()}{disambiguation}{capture}{UCImove[2:4]}'
+
+        undo = self.makeMove(UCImove)
+        if self.inCheck():
+            san += '#' if not self.legalMoves() else '+'
+        self.unmakeMove(undo)
+        return san
+
+    def sanToMove(self, san):
+        '''Takes a move in standard algebraic notation and returns the matching legal move in UCI format,
+        or None if there is no such move.'''
+        wanted = normalizeSAN(san)
+        legal = self.legalMoves()
+        if wanted in ['O-O', 'O-O-O']:
+            king = 'K' if self.toMove == 'white' else 'k'
+            for move in legal:
+                fromIdx = co.squareIndex(move[:2])
+                toIdx = co.squareIndex(move[2:4])
+                if self.letters[fromIdx] == king and toIdx - fromIdx == (2 if wanted == 'O-O' else -2):
+                    return move
+            return None
+
+        match = sanPattern.match(wanted)
+        if match is None:
+            return None
+        piece, fromFile, fromRank, destination, promotion = match.groups()
+        piece = piece or 'P'
+        promotion = promotion.lower() if promotion else ''
+        candidates = [move for move in legal if move[2:4] == destination and move[4:] == promotion
+                      and self.letters[co.squareIndex(move[:2])].upper() == piece
+                      and (fromFile is None or move[0] == fromFile) and (fromRank is None or move[1] == fromRank)]
+        return candidates[0] if len(candidates) == 1 else None
+
+# A normalized SAN move (see normalizeSAN): piece letter (none for pawns), origin file and rank where given,
+# destination square and promotion piece.
+sanPattern = re.compile(r'^([KQRBN])?([a-h])?([1-8])?x?([a-h][1-8])([QRBNqrbn])?$')
+
+def normalizeSAN(san):
+    '''Strips check, annotation and promotion marks from a SAN move so that different spellings compare equal.'''
+    for character in '+#!?=':
+        san = san.replace(character, '')
+    return san.replace('0', 'O')
+
+class SearchStopped(Exception):
+    '''Raised inside the search when a time or node limit has been reached, or a stop has been requested.'''
+
+# Transposition table entry flags: the stored score is exact, a lower bound (fail high) or an upper bound (fail low).
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+class TranspositionTable:
+    '''A fixed-size table of search results indexed by position hash. Takes a 'sizeMB' argument; a new entry always
+    replaces the one stored in its slot.'''
+    entryBytes = 120    # Approximate memory used by one entry tuple in CPython.
+
+    def __init__(self, sizeMB = 16):
+        self.resize(sizeMB)
+
+    def resize(self, sizeMB):
+        '''Reallocates the table for 'sizeMB' megabytes. This clears all entries.'''
+        self.sizeMB = sizeMB
+        self.size = max(1, sizeMB * 1024 * 1024 // self.entryBytes)
+        self.entries = [None] * self.size
+
+    def clear(self):
+        '''Removes all entries.'''
+        self.entries = [None] * self.size
+
+    def probe(self, positionHash):
+        '''Returns the (hash, depth, score, flag, move) entry for the position, or None if it is not stored.'''
+        entry = self.entries[positionHash % self.size]
+        if entry is not None and entry[0] == positionHash:
+            return entry
+        return None
+
+    def store(self, positionHash, depth, score, flag, move):
+        '''Stores a search result for the position.'''
+        self.entries[positionHash % self.size] = (positionHash, depth, score, flag, move)
+
+class EvaluationCache:
+    '''A fixed-size cache of evaluation results indexed by a 64-bit hash. Takes 'sizeMB' and 'entryBytes' (the
+    approximate memory used by one entry) arguments. Each hash maps to a single slot and a new entry evicts the one
+    stored there, so memory never grows beyond the size given and the most recently evaluated positions are kept.
+    Probes, hits and evictions are counted for .getHitRate().'''
+    def __init__(self, sizeMB = 4, entryBytes = 100):
+        self.entryBytes = entryBytes
+        self.resize(sizeMB)
+
+    def resize(self, sizeMB):
+        '''Reallocates the cache for 'sizeMB' megabytes. This clears all entries and counters.'''
+        self.sizeMB = sizeMB
+        self.size = max(1, sizeMB * 1024 * 1024 // self.entryBytes)
+        self.clear()
+
+    def clear(self):
+        '''Removes all entries and resets the counters.'''
+        self.keys = [None] * self.size
+        self.values = [None] * self.size
+        self.resetCounters()
+
+    def resetCounters(self):
+        '''Sets the probe, hit and eviction counters back to zero.'''
+        self.probes = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def probe(self, key):
+        '''Returns the value stored for the hash, or None if it is not stored.'''
+        self.probes += 1
+        slot = key % self.size
+        if self.keys[slot] == key:
+            self.hits += 1
+            return self.values[slot]
+        return None
+
+    def store(self, key, value):
+        '''Stores a value for the hash, evicting any other entry in its slot.'''
+        slot = key % self.size
+        if self.keys[slot] is not None and self.keys[slot] != key:
+            self.evictions += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+
+    def getHitRate(self):
+        '''Returns the fraction of probes that found their entry, or None before the first probe.'''
+        return hitRate(self.hits, self.probes)
+
+def hitRate(hits, probes):
+    '''Returns hits / probes for cache counters, or None if there were no probes.'''
+    return hits / probes if probes else None
+
+def scoreToTable(score, ply):
+    '''Converts a mate score from "mate in n plies from the root" to "mate in n plies from this node" for storing.'''
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+def scoreFromTable(score, ply):
+    '''Reverses scoreToTable() for a node at 'ply'.'''
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+def leastValuableAttacker(letters, index, color):
+    '''Returns the index of the least valuable piece of 'color' attacking the square, or None if there is none.'''
+    king, queen, rook, bishop, knight, pawn = co.pieceLettersByColor[color]
+    for square in co.pawnAttacks[co.opponentColor[color]][index]:
+        if letters[square] == pawn:
+            return square
+    for square in co.knightTargets[index]:
+        if letters[square] == knight:
+            return square
+    found = {}
+    for rays, slider in [(co.bishopRays[index], bishop), (co.rookRays[index], rook)]:
+        for ray in rays:
+            for square in ray:
+                piece = letters[square]
+                if piece is not None:
+                    if piece == slider or piece == queen:
+                        found.setdefault(piece, square)
+                    break
+    for piece in [bishop, rook, queen]:
+        if piece in found:
+            return found[piece]
+    for square in co.kingTargets[index]:
+        if letters[square] == king:
+            return square
+    return None
+
+def staticExchange(position: Position, UCImove):
+    '''Returns the material balance (in centipawns, for the moving side) of the capture sequence started by a move,
+    with both sides recapturing on the square with their least valuable piece while it pays off. Pins are ignored.'''
+    letters = position.letters[:]
+    fromIdx = co.squareIndex(UCImove[:2])
+    toIdx = co.squareIndex(UCImove[2:4])
+    piece = letters[fromIdx]
+    if piece in 'Pp' and toIdx == position.epIndex:
+        letters[toIdx - 8 if piece == 'P' else toIdx + 8] = None
+        gains = [exchangeValues['p']]
+    else:
+        gains = [exchangeValues[letters[toIdx].lower()] if letters[toIdx] is not None else 0]
+    onSquare = exchangeValues[piece.lower()]
+    if len(UCImove) > 4:
+        gains[0] += exchangeValues[UCImove[4]] - exchangeValues['p']
+        onSquare = exchangeValues[UCImove[4]]
+    letters[fromIdx] = None
+    letters[toIdx] = piece
+    side = co.opponentColor[position.toMove]
+
+    while True:
+        attacker = leastValuableAttacker(letters, toIdx, side)
+        if attacker is None:
+            break
+        gains.append(onSquare - gains[-1])
+        onSquare = exchangeValues[letters[attacker].lower()]
+        letters[toIdx] = letters[attacker]
+        letters[attacker] = None
+        side = co.opponentColor[side]
+
+    for idx in range(len(gains) - 1, 0, -1):   # Either side may stop recapturing when it would lose material.
+        gains[idx - 1] = -max(-gains[idx - 1], gains[idx])
+    return gains[0]
+
+def perft(position: Position, depth, stopEvent = None):
+    '''Returns the number of leaf positions reached by playing every legal move sequence of 'depth' plies. Raises
+    SearchStopped (leaving the position part-way through a move sequence) if 'stopEvent' is set while counting.'''
+    if stopEvent is not None and stopEvent.is_set():
+        raise SearchStopped
+    moves = position.legalMoves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        undo = position.makeMove(move)
+        nodes += perft(position, depth - 1, stopEvent)
+        position.unmakeMove(undo)
+    return nodes
+
+class SearchResult:
+    '''The outcome of a search: best move, score (centipawns from the side to move's point of view), depth completed,
+    nodes searched, time taken in seconds and principal variation.'''
+    def __init__(self):
+        self.bestMove = None
+        self.score = 0
+        self.depth = 0
+        self.nodes = 0
+        self.seconds = 0.0
+        self.pv = []
+
+    def getNodesPerSecond(self):
+        '''Returns the search speed in nodes per second.'''
+        return int(self.nodes / self.seconds) if self.seconds > 0 else 0
+
+class Engine:
+    '''An iterative-deepening alpha-beta searcher over Position objects. Takes optional 'hashSizeMB', 'evalCacheMB' and
+    'pawnHashMB' arguments for the sizes of its transposition table, evaluation cache and pawn hash table. The search
+    can be stopped from another thread with .stop().'''
+    def __init__(self, hashSizeMB = 16, options = None, evalCacheMB = 4, pawnHashMB = 1):
+        self.options = dict(defaultOptions)
+        if options is not None:
+            self.options.update(options)
+        self.nodes = 0
+        self.nodeLimit = None
+        self.deadline = None
+        self.table = TranspositionTable(hashSizeMB)
+        # Both caches outlive a single search: evaluations do not depend on the search that requested them.
+        self.evalCache = EvaluationCache(evalCacheMB, entryBytes = 100)
+        self.pawnTable = EvaluationCache(pawnHashMB, entryBytes = 400)
+        self.stopEvent = threading.Event()      # Cleared by the caller before a search that may be stopped.
+        self.searchStarted = threading.Event()  # Set once a search has set its limits (see .setMovetime()).
+        self.killers = []
+        self.history = {}
+        self.stats = {}
+        self.rootDepth = 1
+
+    def setOption(self, name, enabled):
+        '''Switches a search feature (see defaultOptions) on or off. Changing an evaluation term clears the evaluation
+        caches, whose entries include it.'''
+        if self.options[name] != enabled and name in evaluationOptions:
+            self.clearCaches()
+        self.options[name] = enabled
+
+    def clearCaches(self):
+        '''Removes all entries from the transposition table, evaluation cache and pawn hash table.'''
+        self.table.clear()
+        self.evalCache.clear()
+        self.pawnTable.clear()
+
+    def resetOrdering(self):
+        '''Clears the killer moves, history table and move-ordering statistics before a new search.'''
+        self.killers = [[None, None] for ply in range(256)]
+        self.history = {letter: [0] * 64 for letter in 'KQRBNPkqrbnp'}
+        self.stats = {'cutoffs': 0, 'firstMoveCutoffs': 0}
+
+    def orderMoves(self, position: Position, moves, ply, tableMove = None):
+        '''Sorts the moves in place, most promising first: the transposition table move, winning and equal captures,
+        killer moves, quiet moves by history score, and finally captures that lose material.'''
+        letters = position.letters
+        killers = self.killers[ply] if self.options['killers'] else [None, None]
+        useMvvLva = self.options['mvvLva']
+        useSEE = self.options['see']
+        useHistory = self.options['history']
+
+        def moveScore(move):
+            if move == tableMove:
+                return 10000000
+            if position.isCapture(move) or len(move) > 4:
+                if useSEE:
+                    exchange = staticExchange(position, move)
+                    if exchange < 0:
+                        return -1000000 + exchange
+                if useMvvLva:
+                    victim = letters[co.squareIndex(move[2:4])]
+                    victimValue = exchangeValues[victim.lower()] if victim is not None else exchangeValues['p']
+                    if len(move) > 4:
+                        victimValue += exchangeValues[move[4]]
+                    return 2000000 + 10 * victimValue - exchangeValues[letters[co.squareIndex(move[:2])].lower()] // 100
+                if useSEE:
+                    return 2000000 + exchange
+            if move == killers[0]:
+                return 1000001
+            if move == killers[1]:
+                return 1000000
+            if useHistory:
+                return self.history[letters[co.squareIndex(move[:2])]][co.squareIndex(move[2:4])]
+            return 0
+
+        moves.sort(key = moveScore, reverse = True)
+
+    def recordCutoff(self, position: Position, move, depth, ply, moveNumber):
+        '''Updates the killer moves, history table and statistics after 'move' caused a beta cutoff.'''
+        self.stats['cutoffs'] += 1
+        if moveNumber == 0:
+            self.stats['firstMoveCutoffs'] += 1
+        if position.isCapture(move) or len(move) > 4:
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        historyRow = self.history[position.letters[co.squareIndex(move[:2])]]
+        toIdx = co.squareIndex(move[2:4])
+        historyRow[toIdx] += depth * depth
+        if historyRow[toIdx] > 900000:    # Keep history scores below the killer move scores.
+            for row in self.history.values():
+                for idx in range(64):
+                    row[idx] //= 2
+
+    def stop(self):
+        '''Asks a running search to return as soon as possible.'''
+        self.stopEvent.set()
+
+    def setMovetime(self, movetime):
+        '''Gives the running search 'movetime' milliseconds from now (used when a ponder search becomes a real one).'''
+        self.deadline = time.perf_counter() + movetime / 1000
+
+    def evaluate(self, position: Position):
+        '''Returns the evaluation in centipawns from the point of view of the player to move. The piece-square score is
+        kept up to date by the position as moves are made, pawn terms are looked up by pawn hash and whole evaluations
+        by position hash. With the 'debugEval' option both are checked against a full evaluation.'''
+        useCache = self.options['evalCache']
+        debug = self.options['debugEval']
+        cached = self.evalCache.probe(position.hash) if useCache else None
+        if cached is not None and not debug:
+            return cached
+
+        middlegame, endgame, phase = position.middlegameScore, position.endgameScore, position.phase
+        if debug:
+            fromScratch = ev.evaluateFromScratch(position.letters)
+            if fromScratch != (middlegame, endgame, phase):
+                raise RuntimeError(f'Incremental evaluation {(middlegame, endgame, phase)} '
+                                   f'does not match full evaluation {fromScratch} in {position.toFEN()}')
+            if position.pawnHash != position.computePawnHash():
+                raise RuntimeError(f'Incremental pawn hash does not match full pawn hash in {position.toFEN()}')
+        if self.options['pawnStructure']:
+            pawnEntry = self.pawnTable.probe(position.pawnHash) if useCache and not debug else None
+            if pawnEntry is None:
+                pawnEntry = ev.pawnEvaluation(position.letters)
+                if useCache:
+                    self.pawnTable.store(position.pawnHash, pawnEntry)
+            pawnMiddlegame, pawnEndgame, whiteShelter, blackShelter = pawnEntry
+            middlegame += pawnMiddlegame + ev.kingSafety(whiteShelter, blackShelter, position.kingIndex['white'],
+                                                         position.kingIndex['black'])
+            endgame += pawnEndgame
+
+        score = ev.taperedScore(middlegame, endgame, phase)
+        if position.toMove == 'black':
+            score = -score
+        if debug and cached is not None and cached != score:
+            raise RuntimeError(f'Cached evaluation {cached} does not match full evaluation {score} in {position.toFEN()}')
+        if useCache:
+            self.evalCache.store(position.hash, score)
+        return score
+
+    def checkLimits(self):
+        '''Raises SearchStopped once the node or time limit has been reached, or a stop has been requested.'''
+        if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            raise SearchStopped
+        if (self.nodes & clockCheckMask) == 0:
+            if self.stopEvent.is_set() or (self.deadline is not None and time.perf_counter() >= self.deadline):
+                raise SearchStopped
+
+    def principalVariation(self, position: Position, depth):
+        '''Follows the best moves stored in the transposition table from the position and returns them as a list.'''
+        position = position.copy()
+        pv = []
+        while len(pv) < depth:
+            entry = self.table.probe(position.hash)
+            if entry is None or entry[4] is None or entry[4] not in position.legalMoves():
+                break
+            pv.append(entry[4])
+            position.makeMove(entry[4])
+            if position.isRepetition():
+                break
+        return pv
+
+    def search(self, position: Position, depth = None, movetime = None, nodes = None, infoCallback = None):
+        '''Searches the position until 'depth' plies are completed, 'movetime' milliseconds have passed or 'nodes'
+        nodes have been searched, and returns a SearchResult. With no limits the search runs until .stop() is called.
+        'infoCallback', if given, is called with the SearchResult after each completed depth.'''
+        position = position.copy()     # A stopped search unwinds without unmaking its moves.
+        startTime = time.perf_counter()
+        self.nodes = 0
+        self.nodeLimit = nodes
+        self.deadline = startTime + movetime / 1000 if movetime is not None else None
+        self.searchStarted.set()
+        self.resetOrdering()
+        result = SearchResult()
+
+        rootMoves = position.legalMoves()
+        if rootMoves == []:
+            result.score = -MATE_SCORE if position.inCheck() else 0
+            return result
+        self.orderMoves(position, rootMoves, 0)
+        result.bestMove = rootMoves[0]
+
+        for currentDepth in range(1, (depth or 100) + 1):
+            self.rootDepth = currentDepth
+            try:
+                score, bestMove = self.searchRoot(position, currentDepth, rootMoves)
+            except SearchStopped:
+                break
+            rootMoves.remove(bestMove)
+            rootMoves.insert(0, bestMove)
+            result.bestMove = bestMove
+            result.score = score
+            result.depth = currentDepth
+            result.nodes = self.nodes
+            result.seconds = time.perf_counter() - startTime
+            result.pv = self.principalVariation(position, currentDepth)
+            if infoCallback is not None:
+                infoCallback(result)
+            if abs(score) >= MATE_BOUND or (len(rootMoves) == 1 and depth is None and movetime is not None):
+                break
+
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - startTime
+        return result
+
+    def searchRoot(self, position: Position, depth, rootMoves):
+        '''Searches every root move to 'depth' plies and returns the best score and move.'''
+        alpha = -INFINITY
+        bestMove = rootMoves[0]
+        for move in rootMoves:
+            undo = position.makeMove(move)
+            score = -self.alphaBeta(position, depth - 1, -INFINITY, -alpha, 1)
+            position.unmakeMove(undo)
+            if score > alpha:
+                alpha = score
+                bestMove = move
+        self.table.store(position.hash, depth, scoreToTable(alpha, 0), EXACT, bestMove)
+        return alpha, bestMove
+
+    def quiescence(self, position: Position, alpha, beta, ply):
+        '''Searches captures and promotions (or every evasion when in check) until the position is quiet, so that the
+        evaluation is not taken in the middle of an exchange.'''
+        self.nodes += 1
+        self.checkLimits()
+
+        inCheck = position.inCheck()
+        if not inCheck:
+            standPat = self.evaluate(position)
+            if standPat >= beta:
+                return standPat
+            alpha = max(alpha, standPat)
+
+        moves = position.legalMoves()
+        if moves == []:
+            return -MATE_SCORE + ply if inCheck else 0
+        if not inCheck:
+            moves = [move for move in moves if position.isCapture(move) or len(move) > 4]
+            if self.options['see']:
+                moves = [move for move in moves if staticExchange(position, move) >= 0]
+        self.orderMoves(position, moves, ply)
+
+        bestScore = alpha if not inCheck else -INFINITY
+        for move in moves:
+            undo = position.makeMove(move)
+            score = -self.quiescence(position, -beta, -alpha, ply + 1)
+            position.unmakeMove(undo)
+            if score > bestScore:
+                bestScore = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return bestScore
+
+    def alphaBeta(self, position: Position, depth, alpha, beta, ply, allowNullMove = True):
+        '''Negamax alpha-beta search. Returns the score of the position from the point of view of the player to move.'''
+        self.nodes += 1
+        self.checkLimits()
+
+        if position.halfmoveClock >= 100 or position.isRepetition():
+            return 0
+        inCheck = position.inCheck()
+        if inCheck and self.options['checkExtensions'] and ply < 2 * self.rootDepth:
+            depth += 1
+        if depth <= 0:
+            if self.options['quiescence']:
+                self.nodes -= 1     # The quiescence search counts this node itself.
+                return self.quiescence(position, alpha, beta, ply)
+            return self.evaluate(position)
+
+        tableMove = None
+        entry = self.table.probe(position.hash)
+        if entry is not None:
+            tableMove = entry[4]
+            if entry[1] >= depth:
+                tableScore = scoreFromTable(entry[2], ply)
+                if entry[3] == EXACT or (entry[3] == LOWER_BOUND and tableScore >= beta) or \
+                        (entry[3] == UPPER_BOUND and tableScore <= alpha):
+                    return tableScore
+
+        # Null-move pruning: if passing still fails high after a reduced search, a real move would too.
+        if self.options['nullMove'] and allowNullMove and not inCheck and depth >= 3 and \
+                position.phase >= nullMoveMinPhase and position.hasNonPawnMaterial(position.toMove) and \
+                abs(beta) < MATE_BOUND and self.evaluate(position) >= beta:
+            reduction = 3 if depth > 6 else 2
+            undo = position.makeNullMove()
+            score = -self.alphaBeta(position, depth - 1 - reduction, -beta, -beta + 1, ply + 1, allowNullMove = False)
+            position.unmakeNullMove(undo)
+            if score >= beta:
+                return beta
+
+        moves = position.legalMoves()
+        if moves == []:
+            return -MATE_SCORE + ply if inCheck else 0
+        self.orderMoves(position, moves, ply, tableMove)
+
+        originalAlpha = alpha
+        bestScore = -INFINITY
+        bestMove = None
+        killers = self.killers[ply]
+        for moveNumber, move in enumerate(moves):
+            quiet = not position.isCapture(move) and len(move) == 4
+            undo = position.makeMove(move)
+            # Late move reductions: quiet moves ordered late are searched shallower with a null window first,
+            # and searched again at full depth only if they beat alpha.
+            if self.options['lmr'] and moveNumber >= 3 and depth >= 3 and quiet and not inCheck and \
+                    move not in killers and not position.inCheck():
+                reduction = 2 if moveNumber >= 6 and depth >= 5 else 1
+                score = -self.alphaBeta(position, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if score > alpha:
+                    score = -self.alphaBeta(position, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self.alphaBeta(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmakeMove(undo)
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.recordCutoff(position, move, depth, ply, moveNumber)
+                        break
+
+        if bestScore >= beta:
+            flag = LOWER_BOUND
+        elif bestScore > originalAlpha:
+            flag = EXACT
+        else:
+            flag = UPPER_BOUND
+        self.table.store(position.hash, depth, scoreToTable(bestScore, ply), flag, bestMove)
+        return bestScore
@@ -0,0 +1,188 @@
+'''Evaluation used by ChessEngine. Every piece on a square is worth a middlegame and an endgame score (material plus a
+square bonus), and the two totals are blended by the game phase. Scores are in centipawns from white's point of view,
+so they can be updated by adding and subtracting single piece-square terms as moves are made.
+Pawn-structure and king-shelter terms depend only on where the pawns are, so ChessEngine caches them by pawn hash.'''
+
+# Material values (middlegame, endgame).
+materialValues = {'p': (82, 94), 'n': (337, 281), 'b': (365, 297), 'r': (477, 512), 'q': (1025, 936), 'k': (0, 0)}
+
+# Game phase contributed by each piece. The full set of pieces adds up to maxPhase (pure middlegame);
+# a phase of 0 is a pure endgame.
+phaseWeights = {'p': 0, 'n': 1, 'b': 1, 'r': 2, 'q': 4, 'k': 0}
+maxPhase = 24
+
+# Square bonuses from white's point of view, listed from rank 8 (top row) down to rank 1, files a to h.
+pawnMiddlegame = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     60,  60,  60,  60,  60,  60,  60,  60,
+     15,  15,  25,  35,  35,  25,  15,  15,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   5,  20,  20,   5,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0]
+pawnEndgame = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     90,  90,  90,  90,  90,  90,  90,  90,
+     55,  55,  50,  45,  45,  50,  55,  55,
+     30,  30,  25,  20,  20,  25,  30,  30,
+     15,  15,  10,  10,  10,  10,  15,  15,
+      5,   5,   5,   5,   5,   5,   5,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+      0,   0,   0,   0,   0,   0,   0,   0]
+knightTable = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50]
+bishopTable = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20]
+rookTable = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0]
+queenTable = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20]
+kingMiddlegame = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20]
+kingEndgame = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50]
+
+squareTables = {'p': (pawnMiddlegame, pawnEndgame), 'n': (knightTable, knightTable), 'b': (bishopTable, bishopTable),
+                'r': (rookTable, rookTable), 'q': (queenTable, queenTable), 'k': (kingMiddlegame, kingEndgame)}
+
+def buildPieceSquareScores():
+    '''Returns two dicts (middlegame, endgame) mapping each piece letter to a list of 64 scores indexed like
+    Board.squares (0 = 'a1'), including material. Black pieces are mirrored and negated.'''
+    middlegame = {}
+    endgame = {}
+    for letter, (mgTable, egTable) in squareTables.items():
+        mgValue, egValue = materialValues[letter]
+        # The tables list rank 8 first, so a white piece on index i uses entry i ^ 56 and a black piece entry i.
+        middlegame[letter.upper()] = [mgValue + mgTable[index ^ 56] for index in range(64)]
+        endgame[letter.upper()] = [egValue + egTable[index ^ 56] for index in range(64)]
+        middlegame[letter] = [-(mgValue + mgTable[index]) for index in range(64)]
+        endgame[letter] = [-(egValue + egTable[index]) for index in range(64)]
+    return middlegame, endgame
+
+middlegameScores, endgameScores = buildPieceSquareScores()
+piecePhase = {letter: phaseWeights[letter.lower()] for letter in 'KQRBNPkqrbnp'}
+
+def evaluateFromScratch(letters):
+    '''Takes a list of 64 piece letters and returns the (middlegame score, endgame score, phase) of the position.'''
+    middlegame = endgame = phase = 0
+    for index, piece in enumerate(letters):
+        if piece is not None:
+            middlegame += middlegameScores[piece][index]
+            endgame += endgameScores[piece][index]
+            phase += piecePhase[piece]
+    return middlegame, endgame, phase
+
+def taperedScore(middlegame, endgame, phase):
+    '''Blends the middlegame and endgame scores by the game phase (capped at maxPhase after promotions).'''
+    phase = min(phase, maxPhase)
+    return (middlegame * phase + endgame * (maxPhase - phase)) // maxPhase
+
+# Pawn-structure terms (middlegame, endgame).
+doubledPawnPenalty = (10, 20)      # for each pawn beyond the first on a file
+isolatedPawnPenalty = (10, 15)     # for a pawn with no friendly pawn on either neighbouring file
+# Passed pawn bonus by rank counted from the pawn's own side (index 1 = starting rank).
+passedPawnMiddlegame = [0, 5, 10, 15, 25, 40, 60, 0]
+passedPawnEndgame = [0, 10, 15, 25, 45, 70, 110, 0]
+# King shelter (middlegame only): for each file next to or in front of a king on its first two ranks.
+shieldPawnBonus = (10, 5)          # friendly pawn one or two ranks in front of the back rank
+missingShieldPenalty = 15          # neither
+
+def pawnEvaluation(letters):
+    '''Takes a list of 64 piece letters and returns the (middlegame score, endgame score, white shelter, black shelter)
+    pawn terms. The shelters are lists of the king-shelter score for a king on each file. Only pawns are looked at.'''
+    pawnRanks = {'P': [[] for fileIdx in range(8)], 'p': [[] for fileIdx in range(8)]}
+    for index, piece in enumerate(letters):
+        if piece == 'P' or piece == 'p':
+            pawnRanks[piece][index % 8].append(index // 8)
+
+    middlegame = endgame = 0
+    for pawn, sign in [('P', 1), ('p', -1)]:
+        ownRanks = pawnRanks[pawn]
+        enemyRanks = pawnRanks['p' if pawn == 'P' else 'P']
+        for fileIdx in range(8):
+            ranks = ownRanks[fileIdx]
+            if ranks == []:
+                continue
+            neighbours = range(max(0, fileIdx - 1), min(7, fileIdx + 1) + 1)
+            if len(ranks) > 1:
+                middlegame -= sign * doubledPawnPenalty[0] * (len(ranks) - 1)
+                endgame -= sign * doubledPawnPenalty[1] * (len(ranks) - 1)
+            if all(ownRanks[neighbour] == [] for neighbour in neighbours if neighbour != fileIdx):
+                middlegame -= sign * isolatedPawnPenalty[0] * len(ranks)
+                endgame -= sign * isolatedPawnPenalty[1] * len(ranks)
+            for rank in ranks:
+                # Passed if no enemy pawn is ahead of it on its own or a neighbouring file.
+                if all(enemyRank <= rank if sign == 1 else enemyRank >= rank
+                       for neighbour in neighbours for enemyRank in enemyRanks[neighbour]):
+                    relativeRank = rank if sign == 1 else 7 - rank
+                    middlegame += sign * passedPawnMiddlegame[relativeRank]
+                    endgame += sign * passedPawnEndgame[relativeRank]
+
+    shelters = []
+    for pawn, shieldRanks in [('P', (1, 2)), ('p', (6, 5))]:
+        shelter = []
+        for kingFile in range(8):
+            score = 0
+            for fileIdx in range(max(0, kingFile - 1), min(7, kingFile + 1) + 1):
+                if shieldRanks[0] in pawnRanks[pawn][fileIdx]:
+                    score += shieldPawnBonus[0]
+                elif shieldRanks[1] in pawnRanks[pawn][fileIdx]:
+                    score += shieldPawnBonus[1]
+                else:
+                    score -= missingShieldPenalty
+            shelter.append(score)
+        shelters.append(shelter)
+    return middlegame, endgame, shelters[0], shelters[1]
+
+def kingSafety(whiteShelter, blackShelter, whiteKingIndex, blackKingIndex):
+    '''Takes the shelters from pawnEvaluation() and the king squares, and returns the middlegame king-shelter score.
+    A king that has left its first two ranks gets no shelter score.'''
+    score = 0
+    if whiteKingIndex is not None and whiteKingIndex // 8 <= 1:
+        score += whiteShelter[whiteKingIndex % 8]
+    if blackKingIndex is not None and blackKingIndex // 8 >= 6:
+        score -= blackShelter[blackKingIndex % 8]
+    return score
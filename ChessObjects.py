@@ -277,11 +277,28 @@ class chessGame:
         self.blackProposesDraw = False
         self.whiteKingPos = 'e1'
         self.blackKingPos = 'e8'
+        self.legalMovesCache = None         # Legal moves of the current position, built on first use after each move.
+        self.legalDestinationsCache = None
 
     def getTurn(self):
         '''Returns the current player to move ('white' or 'black').'''
         return self.toMove
 
+    def getLegalMoves(self):
+        '''Returns a list of all legal moves in the current position in UCI format. The list is computed once per position.'''
+        if self.legalMovesCache is None:
+            lastMove = self.movesObjects[-1] if self.movesObjects != [] else None
+            self.legalMovesCache = legalMoves(self.board, self.toMove, lastMove)
+            self.legalDestinationsCache = {}
+            for legalMove in self.legalMovesCache:
+                self.legalDestinationsCache.setdefault(legalMove[:2], set()).add(legalMove[2:4])
+        return self.legalMovesCache
+
+    def getLegalDestinations(self, fromSquare):
+        '''Takes a position argument (eg. 'e2') and returns the set of squares the piece there can legally move to.'''
+        self.getLegalMoves()
+        return self.legalDestinationsCache.get(fromSquare, set())
+
     def __switchToMove(self):
         '''Switches the current player to move ('white' -> 'black' or vice versa).'''
         switchMoveMap = {'white': 'black', 'black': 'white'}
@@ -311,17 +328,12 @@ class chessGame:
         if self.resultType is not None:
             return 'Move is invalid. The game has already ended.'
 
-        move = Move(self.board, UCImove)
-
-        if self.movesObjects != []:
-            lastMove = self.movesObjects[-1]
-        else:
-            lastMove = None
-
-        # if UCImove not in self.legalMoves:
-        if not testMoveLegality(move, self.toMove, lastMove):
+        legal = self.getLegalMoves()
+        if UCImove not in legal and f'{UCImove}q' not in legal:     # A promotion without a piece letter promotes to a queen.
             return 'This move is illegal'
 
+        move = Move(self.board, UCImove)
+
         # 50 move rule.
         if move.toSquare.getOccupyingPiece() is None and not isinstance(move.getMovedPiece(), Pawn):    # If the move is not a capture and the piece moved is not a pawn
             FiftyMoveAdd = True
@@ -352,6 +364,7 @@ class chessGame:
 
         executableMove.execute()
         self.__switchToMove()
+        self.legalMovesCache = self.legalDestinationsCache = None
         self.movesList.append(UCImove)
         self.movesObjects.append(executableMove)
 
@@ -420,182 +433,324 @@ class chessGame:
         if self.whiteProposesDraw and self.blackProposesDraw:
             self.agreeToDraw()
 
-def pieceSees(board, pieceFrom, lastMove = None):   #   Find the squares that a piece sees.
-    '''Takes arguments 'board', 'pieceFrom', and lastMove (default=None), and finds what squares 'pieceFrom' 'sees' on the board.
-    In other words, it finds a piece's pseudo-legal moves.
-    Note: 'pieceFrom' must be the piece position, not the piece object.'''
-    squareFrom = board.accessSquare(pieceFrom)
-    fileFrom = squareFrom.getFile()
-    fileFromOrd = ord(fileFrom)
-    rankFrom = int(squareFrom.getRank())
-    piece = squareFrom.getOccupyingPiece()
-    pieceSight = []
-
-    if isinstance(piece, Pawn):
-        colorModifier = 1 if piece.getColor() == 'white' else -1
-        if rankFrom not in [1,8] and board.accessSquare(f'{fileFrom}{rankFrom+colorModifier}').getOccupyingPiece() is None:
-            pieceSight.append(f'{fileFrom}{rankFrom+colorModifier}')    # pawn can move 1 square
-        if piece.getHasMoved() is False and board.accessSquare(f'{fileFrom}{rankFrom+(2*colorModifier)}').getOccupyingPiece() is None:  # If the piece hasn't moved...
-            pieceSight.append(f'{fileFrom}{rankFrom + (2 * colorModifier)}')  # pawn can move 2 squares.
-        try:
-            if board.accessSquare(f'{chr(fileFromOrd + 1)}{rankFrom + colorModifier}').getOccupyingPiece() is not None:
-                pieceSight.append(f'{chr(fileFromOrd + 1)}{rankFrom + colorModifier}')    # pawn can move 1 square diagonally
-        except:
-            pass
-        try:
-            if board.accessSquare(f'{chr(fileFromOrd - 1)}{rankFrom + colorModifier}').getOccupyingPiece() is not None:
-                pieceSight.append(f'{chr(fileFromOrd - 1)}{rankFrom + colorModifier}')  # pawn can move 1 square diagonally
-        except:
-            pass
-        if lastMove is not None:    # Logic to allow en passant: last moved piece is pawn, absolute value of file difference is 1, and same rank.
-            if isinstance(lastMove.getMovedPiece(), Pawn) and (abs(ord(lastMove.toSquare.getFile())-fileFromOrd) == 1 and lastMove.toSquare.getRank()-rankFrom == 0):
-                captureDirection = ord(lastMove.toSquare.getFile())-fileFromOrd
-                pieceSight.append(f'{chr(fileFromOrd + captureDirection)}{rankFrom + colorModifier}')
-    elif isinstance(piece, Knight):     # Add all combos of 2x1 moves.
-        for vertMove in [2,-2]:
-            for horiMove in [1,-1]:
-                pieceSight.append(f'{chr(fileFromOrd+horiMove)}{rankFrom+vertMove}')
-        for vertMove in [1,-1]:
-            for horiMove in [2,-2]:
-                pieceSight.append(f'{chr(fileFromOrd+horiMove)}{rankFrom+vertMove}')
-    elif isinstance(piece, Bishop):     # Add all combos of x by x moves.
-        for moveLength in range(1,8):
-            pieceSight.append(f'{chr(fileFromOrd+moveLength)}{rankFrom + moveLength}')
-            pieceSight.append(f'{chr(fileFromOrd + moveLength)}{rankFrom - moveLength}')
-            pieceSight.append(f'{chr(fileFromOrd - moveLength)}{rankFrom + moveLength}')
-            pieceSight.append(f'{chr(fileFromOrd - moveLength)}{rankFrom - moveLength}')
-    elif isinstance(piece, Rook):
-        for moveLength in range(1, 8):  # Add all combos of x by 0 moves.
-            pieceSight.append(f'{chr(fileFromOrd + moveLength)}{rankFrom}')
-            pieceSight.append(f'{chr(fileFromOrd - moveLength)}{rankFrom}')
-            pieceSight.append(f'{fileFrom}{rankFrom + moveLength}')
-            pieceSight.append(f'{fileFrom}{rankFrom - moveLength}')
-    elif isinstance(piece, Queen):  # Add all moves that would be added to a rook or bishop.
-        for moveLength in range(1, 8):  # Add all combos of x by 0 moves.
-            pieceSight.append(f'{chr(fileFromOrd + moveLength)}{rankFrom}')
-            pieceSight.append(f'{chr(fileFromOrd - moveLength)}{rankFrom}')
-            pieceSight.append(f'{fileFrom}{rankFrom + moveLength}')
-            pieceSight.append(f'{fileFrom}{rankFrom - moveLength}')
-            pieceSight.append(f'{chr(fileFromOrd + moveLength)}{rankFrom + moveLength}')
-            pieceSight.append(f'{chr(fileFromOrd + moveLength)}{rankFrom - moveLength}')
-            pieceSight.append(f'{chr(fileFromOrd - moveLength)}{rankFrom + moveLength}')
-            pieceSight.append(f'{chr(fileFromOrd - moveLength)}{rankFrom - moveLength}')
-    elif isinstance(piece, King):
-        pieceSight.append(f'{chr(fileFromOrd + 1)}{rankFrom}')
-        pieceSight.append(f'{chr(fileFromOrd - 1)}{rankFrom}')
-        pieceSight.append(f'{fileFrom}{rankFrom + 1}')
-        pieceSight.append(f'{fileFrom}{rankFrom - 1}')
-        pieceSight.append(f'{chr(fileFromOrd + 1)}{rankFrom + 1}')
-        pieceSight.append(f'{chr(fileFromOrd + 1)}{rankFrom - 1}')
-        pieceSight.append(f'{chr(fileFromOrd - 1)}{rankFrom + 1}')
-        pieceSight.append(f'{chr(fileFromOrd - 1)}{rankFrom - 1}')
-        if piece.getHasMoved() is False:
-            if board.accessSquare(f'h{rankFrom}').getOccupyingPiece() is not None and board.accessSquare(f'h{rankFrom}').getOccupyingPiece().getHasMoved() is False:
-                pieceSight.append(f'{chr(fileFromOrd + 2)}{rankFrom}')
-            if board.accessSquare(f'a{rankFrom}').getOccupyingPiece() is not None and board.accessSquare(f'a{rankFrom}').getOccupyingPiece().getHasMoved() is False:
-                pieceSight.append(f'{chr(fileFromOrd - 2)}{rankFrom}')
-
-    pieceSight2 = []    # remove non-existent squares
-    for square in pieceSight:
-        if square[0] in ['a','b','c','d','e','f','g','h'] and int(square[1:]) in range(1,9):
-            pieceSight2.append(square)
-
-    pieceSight3 = []
-    if not (isinstance(piece, Knight) or isinstance(piece, King)):
-        for squareTo in pieceSight2:   # remove squares whose path is blocked.
-            try:
-                vertDirection = int( (int(squareTo[1]) - rankFrom)/abs(int(squareTo[1]) - rankFrom) )  # Need to be 1 or -1
-            except:
-                vertDirection = 0
-            try:
-                horiDirection = int( (ord(squareTo[0]) - fileFromOrd)/abs(ord(squareTo[0]) - fileFromOrd) )
-            except:
-                horiDirection = 0
+def gameFromFEN(fen):
+    '''Takes a full FEN string (eg. 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1') and returns a chessGame
+    set up in that position. Missing castling rights are recorded by marking the king or rook as moved, and an en passant
+    square is recorded as the last move played.'''
+    fields = fen.split()
+    toMove = 'black' if len(fields) > 1 and fields[1] == 'b' else 'white'
+    castling = fields[2] if len(fields) > 2 else '-'
+    enPassantSquare = fields[3] if len(fields) > 3 else '-'
 
-            blocked = False
-            thisSquare = f'{chr(fileFromOrd + horiDirection)}{int(rankFrom) + vertDirection}'
+    board = Board(fields[0])
+    game = chessGame(board, toMove)
 
-            while blocked is False and thisSquare != squareTo:
-                if board.accessSquare(thisSquare).getOccupyingPiece() is not None:
-                    blocked = True
+    for square in board.squares:
+        piece = square.getOccupyingPiece()
+        if isinstance(piece, Pawn) and square.getRank() != (2 if piece.getColor() == 'white' else 7):
+            piece.markAsMoved()
+        elif isinstance(piece, King):
+            if piece.getColor() == 'white':
+                game.whiteKingPos = square.getFileRank()
+            else:
+                game.blackKingPos = square.getFileRank()
+
+    for rights, kingPos, rookPositions in [('KQ', 'e1', ['h1', 'a1']), ('kq', 'e8', ['h8', 'a8'])]:
+        for right, rookPos in zip(rights, rookPositions):
+            if right not in castling and board.accessSquare(rookPos).getOccupyingPiece() is not None:
+                board.accessSquare(rookPos).getOccupyingPiece().markAsMoved()
+        if not any(right in castling for right in rights) and board.accessSquare(kingPos).getOccupyingPiece() is not None:
+            board.accessSquare(kingPos).getOccupyingPiece().markAsMoved()
+
+    if enPassantSquare != '-':
+        fromRank, toRank = (7, 5) if toMove == 'white' else (2, 4)
+        lastMove = Move(board, f'{enPassantSquare[0]}{fromRank}{enPassantSquare[0]}{toRank}')
+        lastMove.fromPiece = lastMove.toSquare.getOccupyingPiece()     # The pawn has already been moved on the board.
+        game.movesObjects.append(lastMove)
+
+    if len(fields) > 4:
+        game.FiftyMoveCount = int(fields[4])
+
+    return game
+
+# Precomputed square tables used by the legal move generator. Squares are referred to by their index in
+# Board.squares (0 = 'a1', 7 = 'h1', 63 = 'h8').
+def rayTable(directions, sliding):
+    '''Takes a list of (file, rank) steps and returns, for each of the 64 square indices, the list of squares reached
+    along each step. Non-sliding pieces (knight, king) only reach the first square in each direction.'''
+    table = []
+    for index in range(64):
+        rays = []
+        for fileStep, rankStep in directions:
+            ray = []
+            fileIdx, rankIdx = index % 8 + fileStep, index // 8 + rankStep
+            while 0 <= fileIdx < 8 and 0 <= rankIdx < 8:
+                ray.append(8 * rankIdx + fileIdx)
+                if not sliding:
+                    break
+                fileIdx, rankIdx = fileIdx + fileStep, rankIdx + rankStep
+            rays.append(ray)
+        table.append(rays)
+    return table
+
+rookRays = rayTable([(1, 0), (-1, 0), (0, 1), (0, -1)], True)
+bishopRays = rayTable([(1, 1), (1, -1), (-1, 1), (-1, -1)], True)
+knightTargets = [[square for ray in rays for square in ray]
+                 for rays in rayTable([(1, 2), (-1, 2), (1, -2), (-1, -2), (2, 1), (-2, 1), (2, -1), (-2, -1)], False)]
+kingTargets = [[square for ray in rays for square in ray]
+               for rays in rayTable([(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)], False)]
+pawnAttacks = {'white': [[square for ray in rays for square in ray] for rays in rayTable([(1, 1), (-1, 1)], False)],
+               'black': [[square for ray in rays for square in ray] for rays in rayTable([(1, -1), (-1, -1)], False)]}
+pieceLettersByColor = {'white': 'KQRBNP', 'black': 'kqrbnp'}
+opponentColor = {'white': 'black', 'black': 'white'}
+
+def squareIndex(position):
+    '''Takes a position argument (eg. 'a1' thru 'h8') and returns its index in Board.squares.'''
+    return 8 * (int(position[1]) - 1) + (ord(position[0]) - 97)
+
+def squareName(index):
+    '''Takes an index in Board.squares and returns its position (eg. 'a1' thru 'h8').'''
+    return f'{chr(97 + index % 8)}{index // 8 + 1}'
+
+def boardToLetters(board: Board):
+    '''Returns a list of 64 piece letters (uppercase for white, lowercase for black, None for empty squares), in the
+    same order as Board.squares.'''
+    return [None if square.occupyingPiece is None else f'{square.occupyingPiece}' for square in board.squares]
+
+def castlingRights(board: Board):
+    '''Returns the castling rights of the board as a FEN-style string ('KQkq', 'Kq', '-', etc.), based on which kings
+    and rooks have not been moved.'''
+    rights = []
+    for color, rank, letters in [('white', 1, 'KQ'), ('black', 8, 'kq')]:
+        king = board.accessSquare(f'e{rank}').getOccupyingPiece()
+        if not isinstance(king, King) or king.getColor() != color or king.getHasMoved():
+            continue
+        for rookFile, letter in zip(['h', 'a'], letters):
+            rook = board.accessSquare(f'{rookFile}{rank}').getOccupyingPiece()
+            if isinstance(rook, Rook) and rook.getColor() == color and rook.getHasMoved() is False:
+                rights.append(letter)
+    return ''.join(rights) if rights else '-'
+
+def enPassantIndex(lastMove):
+    '''Takes the last move played and returns the index of the square that can be captured onto en passant,
+    or None if the last move was not a two-square pawn advance.'''
+    if lastMove is None or not isinstance(lastMove.getMovedPiece(), Pawn):
+        return None
+    rankFrom = int(lastMove.fromSquare.getRank())
+    rankTo = int(lastMove.toSquare.getRank())
+    if abs(rankTo - rankFrom) != 2:
+        return None
+    return squareIndex(f'{lastMove.toSquare.getFile()}{(rankFrom + rankTo) // 2}')
+
+def isSquareAttacked(letters, index, byColor):
+    '''Takes a list of 64 piece letters (see boardToLetters), a square index, and a color, and returns a Boolean value
+    stating whether any piece of that color attacks the square.'''
+    king, queen, rook, bishop, knight, pawn = pieceLettersByColor[byColor]
+    for square in knightTargets[index]:
+        if letters[square] == knight:
+            return True
+    for square in kingTargets[index]:
+        if letters[square] == king:
+            return True
+    for square in pawnAttacks[opponentColor[byColor]][index]:   # a pawn attacks the squares it would be attacked from
+        if letters[square] == pawn:
+            return True
+    for rays, slider in [(rookRays[index], rook), (bishopRays[index], bishop)]:
+        for ray in rays:
+            for square in ray:
+                piece = letters[square]
+                if piece is not None:
+                    if piece == slider or piece == queen:
+                        return True
                     break
-                thisSquare = f'{chr(ord(thisSquare[0]) + horiDirection)}{int(thisSquare[1]) + vertDirection}'
+    return False
 
-            if blocked is False:
-                pieceSight3.append(squareTo)
-    else:
-        pieceSight3=pieceSight2
+def attackedSquares(letters, byColor):
+    '''Takes a list of 64 piece letters and a color, and returns the set of square indices attacked by that color.'''
+    king, queen, rook, bishop, knight, pawn = pieceLettersByColor[byColor]
+    attacked = set()
+    for index, piece in enumerate(letters):
+        if piece is None or piece not in pieceLettersByColor[byColor]:
+            continue
+        if piece == pawn:
+            attacked.update(pawnAttacks[byColor][index])
+        elif piece == knight:
+            attacked.update(knightTargets[index])
+        elif piece == king:
+            attacked.update(kingTargets[index])
+        else:
+            rays = []
+            if piece != bishop:
+                rays += rookRays[index]
+            if piece != rook:
+                rays += bishopRays[index]
+            for ray in rays:
+                for square in ray:
+                    attacked.add(square)
+                    if letters[square] is not None:
+                        break
+    return attacked
+
+def generateLegalMoves(letters, colorToMove, castling = '-', epIndex = None):
+    '''Takes a list of 64 piece letters (see boardToLetters), the player to move, the castling rights ('KQkq' format)
+    and the en passant square index, and returns a list of all legal moves in UCI format (promotions include the piece
+    letter, eg. 'e7e8q').
+    Pinned pieces, checking pieces and the squares attacked around the king are found once for the position,
+    so only en passant captures need to be played out to test for a discovered check.'''
+    ownLetters = pieceLettersByColor[colorToMove]
+    enemyColor = opponentColor[colorToMove]
+    enemyKing, enemyQueen, enemyRook, enemyBishop, enemyKnight, enemyPawn = pieceLettersByColor[enemyColor]
+    ownKing = ownLetters[0]
+    kingIndex = letters.index(ownKing) if ownKing in letters else None
+    moves = []
+
+    checkers = 0
+    checkMask = None    # squares a non-king move must land on while in check (capture or block the checker)
+    pinRays = {}        # pinned piece index -> squares it may still move to (between the king and the pinner)
+    dangerSquares = set()
+    if kingIndex is not None:
+        # The king is lifted off the board so that it cannot step backwards along a checking slider's line.
+        kinglessLetters = letters[:]
+        kinglessLetters[kingIndex] = None
+        dangerSquares = attackedSquares(kinglessLetters, enemyColor)
+
+        for rays, sliders in [(rookRays[kingIndex], (enemyRook, enemyQueen)), (bishopRays[kingIndex], (enemyBishop, enemyQueen))]:
+            for ray in rays:
+                shield = None
+                for step, square in enumerate(ray):
+                    piece = letters[square]
+                    if piece is None:
+                        continue
+                    if piece in ownLetters:
+                        if shield is not None:
+                            break
+                        shield = square
+                        continue
+                    if piece in sliders:
+                        if shield is None:
+                            checkers += 1
+                            checkMask = set(ray[:step + 1])
+                        else:
+                            pinRays[shield] = set(ray[:step + 1])
+                    break
+        for square in knightTargets[kingIndex]:
+            if letters[square] == enemyKnight:
+                checkers += 1
+                checkMask = {square}
+        for square in pawnAttacks[colorToMove][kingIndex]:
+            if letters[square] == enemyPawn:
+                checkers += 1
+                checkMask = {square}
+
+    def allowed(fromIdx, toIdx):
+        pinRay = pinRays.get(fromIdx)
+        return (pinRay is None or toIdx in pinRay) and (checkMask is None or toIdx in checkMask)
+
+    forward = 8 if colorToMove == 'white' else -8
+    startRank = 1 if colorToMove == 'white' else 6
+    promotionRank = 7 if colorToMove == 'white' else 0
+
+    for fromIdx, piece in enumerate(letters):
+        if piece is None or piece not in ownLetters:
+            continue
+        fromName = squareName(fromIdx)
+
+        if piece == ownKing:
+            for toIdx in kingTargets[fromIdx]:
+                target = letters[toIdx]
+                if (target is None or target not in ownLetters) and toIdx not in dangerSquares:
+                    moves.append(f'{fromName}{squareName(toIdx)}')
+            if checkers == 0:
+                rank = 0 if colorToMove == 'white' else 56
+                if fromIdx == rank + 4:
+                    if ownLetters[0] in castling and letters[rank + 7] == ownLetters[2] and \
+                            letters[rank + 5] is None and letters[rank + 6] is None and \
+                            rank + 5 not in dangerSquares and rank + 6 not in dangerSquares:
+                        moves.append(f'{fromName}{squareName(rank + 6)}')
+                    if ownLetters[1] in castling and letters[rank] == ownLetters[2] and \
+                            letters[rank + 1] is None and letters[rank + 2] is None and letters[rank + 3] is None and \
+                            rank + 3 not in dangerSquares and rank + 2 not in dangerSquares:
+                        moves.append(f'{fromName}{squareName(rank + 2)}')
+            continue
+
+        if checkers > 1:    # double check: only the king can move
+            continue
+
+        destinations = []
+        if piece == ownLetters[5]:
+            oneStep = fromIdx + forward
+            if 0 <= oneStep < 64 and letters[oneStep] is None:
+                destinations.append(oneStep)
+                if fromIdx // 8 == startRank and letters[oneStep + forward] is None:
+                    destinations.append(oneStep + forward)
+            for toIdx in pawnAttacks[colorToMove][fromIdx]:
+                target = letters[toIdx]
+                if target is not None and target not in ownLetters:
+                    destinations.append(toIdx)
+                elif toIdx == epIndex:
+                    # En passant removes two pieces from the same rank, so it is played out to test for discovered check.
+                    testLetters = letters[:]
+                    testLetters[toIdx] = piece
+                    testLetters[fromIdx] = None
+                    testLetters[toIdx - forward] = None
+                    if kingIndex is None or not isSquareAttacked(testLetters, kingIndex, enemyColor):
+                        moves.append(f'{fromName}{squareName(toIdx)}')
+            for toIdx in destinations:
+                if not allowed(fromIdx, toIdx):
+                    continue
+                if toIdx // 8 == promotionRank:
+                    for promotionChoice in 'qrbn':
+                        moves.append(f'{fromName}{squareName(toIdx)}{promotionChoice}')
+                else:
+                    moves.append(f'{fromName}{squareName(toIdx)}')
+            continue
 
-    pieceSight4 = []
-    for square in pieceSight3:  # remove squares that are occupied by a piece of the same color.
-        if board.accessSquare(square).getOccupyingPiece() is None or board.accessSquare(square).getOccupyingPiece().getColor() != piece.getColor():
-            pieceSight4.append(square)
+        if piece == ownLetters[4]:
+            destinations = [toIdx for toIdx in knightTargets[fromIdx]
+                            if letters[toIdx] is None or letters[toIdx] not in ownLetters]
+        else:
+            rays = []
+            if piece != ownLetters[3]:
+                rays += rookRays[fromIdx]
+            if piece != ownLetters[2]:
+                rays += bishopRays[fromIdx]
+            for ray in rays:
+                for toIdx in ray:
+                    target = letters[toIdx]
+                    if target is None:
+                        destinations.append(toIdx)
+                        continue
+                    if target not in ownLetters:
+                        destinations.append(toIdx)
+                    break
+        for toIdx in destinations:
+            if allowed(fromIdx, toIdx):
+                moves.append(f'{fromName}{squareName(toIdx)}')
+
+    return moves
 
-    return pieceSight4
+def legalMoves(board: Board, colorToMove, lastMove = None):
+    '''Takes 'board', 'colorToMove', and lastMove (default=None), and returns a list of all legal moves for the player
+    to move in UCI format (eg. ['e2e4', 'g1f3', 'e7e8q', ...]).'''
+    return generateLegalMoves(boardToLetters(board), colorToMove, castlingRights(board), enPassantIndex(lastMove))
 
 def isCheck(board: Board, colorToMove):
     '''Takes a 'board' and 'colorToMove' argument and determines if the player to move is in check.'''
-    for square in board.squares:
-        if isinstance(square.getOccupyingPiece(), King) and square.getOccupyingPiece().getColor() == colorToMove:
-            squareInQuestion = f'{square.getFile()}{square.getRank()}'
-            break
-    for square in board.squares:
-        if squareInQuestion in pieceSees(board, f'{square.getFile()}{square.getRank()}'):
-            return True
-    return False
+    letters = boardToLetters(board)
+    king = pieceLettersByColor[colorToMove][0]
+    if king not in letters:
+        return False
+    return isSquareAttacked(letters, letters.index(king), opponentColor[colorToMove])
 
 def testMoveLegality(move: Move, colorToMove, lastMove = None):
     '''Takes a move object, the current player to move, and the last move played, and returns a Boolean value stating
     whether a move is legal.'''
-    testBoard = copy.deepcopy(move.board)
-
-    if move.fromPiece.getColor() != colorToMove:    # illegal to move opponent's piece
-        return False
-
-    if move.toSquare.getFileRank() not in pieceSees(move.board, move.fromSquare.getFileRank(), lastMove):   # illegal if the piece does not see the square it moves to
-        return False
-
-    testMove = Move(testBoard, move.UCImove)
-    testMove.execute()
-    if isCheck(testBoard, colorToMove) is True:     # illegal if the move results in a position where moving player is in check.
-        return False
-
-    # Now, to return False if the King is castling through check.
-    fileToOrd = ord(move.toSquare.getFileRank()[0])
-    fileFromOrd = ord(move.fromSquare.getFileRank()[0])
-    distance = fileToOrd - fileFromOrd
-
-    if isinstance(move.getMovedPiece(), King) and abs(fileToOrd-fileFromOrd) == 2:
-        direction = int(distance / abs(distance))
-
-        checkTestBoard = copy.deepcopy(move.board)
-        currentKingPos = move.UCImove[:2]
-        nextSquare = f'{chr(fileFromOrd + direction)}{move.fromSquare.getFileRank()[1]}'
-
-        while currentKingPos != move.toSquare.getFileRank():
-            if isCheck(checkTestBoard, colorToMove) is True:
-                return False
-            else:
-                testMove = Move(checkTestBoard, f'{currentKingPos}{nextSquare}')
-                testMove.execute()
-                currentKingPos = nextSquare
-                nextSquare = f'{chr(ord(currentKingPos[0]) + direction)}{currentKingPos[1]}'
-
-    return True
+    legal = legalMoves(move.board, colorToMove, lastMove)
+    return move.UCImove in legal or f'{move.UCImove}q' in legal     # A promotion without a piece letter promotes to a queen.
 
 def hasLegalMoves(game: chessGame):
     '''Takes a game object and returns a Boolean value stating whether there are any legal moves for the current player to move.'''
-    lastMove = game.movesObjects[-1] if game.movesObjects != [] else None
-
-    testableFromSquares = [square for square in game.board.squares if square.getOccupyingPiece() is not None and square.getOccupyingPiece().getColor() == game.toMove]
-    for square in testableFromSquares:
-        testableToSquares = pieceSees(game.board, square.getFileRank(), lastMove = lastMove)
-        for squareTo in testableToSquares:
-            squareToObject = game.board.accessSquare(squareTo)
-            testMove = Move(game.board, f'{square.getFileRank()}{squareToObject.getFileRank()}')
-            if testMoveLegality(testMove, game.toMove, lastMove = lastMove) is True:
-                return True
-    return False
+    return len(game.getLegalMoves()) > 0
 
 def isCheckMateOrStaleMate(game: chessGame):
     '''Takes a game object and returns 'checkmate', 'stalemate', or None for the current player to move.'''
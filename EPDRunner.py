@@ -0,0 +1,150 @@
+'''Scores a suite of EPD test positions (with 'bm' best-move or 'am' avoid-move operations) using ChessEngine.
+Positions are searched in parallel on a process pool, and the solve rate, nodes/sec and time-to-solution of each
+position are written as CSV or JSON.
+
+Usage: python EPDRunner.py suite.epd [--depth 5 | --movetime 2000] [--workers 4] [--disable lmr,nullMove]
+                            [--format csv|json] [--output results.csv]'''
+
+import argparse
+import concurrent.futures
+import csv
+import json
+import os
+import re
+import sys
+
+import ChessObjects as co
+import ChessEngine as ce
+
+resultFields = ['id', 'fen', 'bm', 'am', 'move', 'solved', 'score', 'depth', 'nodes', 'seconds', 'nps', 'timeToSolution']
+
+def parseEPD(line):
+    '''Takes one line of an EPD file and returns a (fen, operations) tuple, where operations is a dict of opcode -> operand
+    string (eg. {'bm': 'Nf3 Nc3', 'id': 'WAC.001'}). Returns None for blank and comment lines.'''
+    line = line.strip()
+    if line == '' or line.startswith('#'):
+        return None
+    fields = line.split(None, 4)
+    operations = {}
+    if len(fields) > 4:
+        for opcode, operand in re.findall(r'(\w+)\s*((?:"[^"]*"|[^;])*);', fields[4]):
+            operations[opcode] = operand.strip().strip('"')
+    halfmoveClock = operations.get('hmvc', '0')
+    fullmoveNumber = operations.get('fmvn', '1')
+    return f"{' '.join(fields[:4])} {halfmoveClock} {fullmoveNumber}", operations
+
+def movesFromOperand(position, operand):
+    '''Takes a position and a space-separated list of SAN (or UCI) moves and returns the matching legal moves in UCI format.'''
+    moves = []
+    legal = position.legalMoves()
+    for token in operand.split():
+        move = token if token in legal else position.sanToMove(token)
+        if move is not None:
+            moves.append(move)
+    return moves
+
+def analysePosition(task):
+    '''Takes a (number, fen, operations, depth, movetime, options) tuple, searches the position and returns a result row
+    (a dict with the keys in resultFields). Runs inside a worker process.'''
+    number, fen, operations, depth, movetime, options = task
+    game = co.gameFromFEN(fen)
+    position = ce.Position.fromGame(game)
+    bestMoves = movesFromOperand(position, operations.get('bm', ''))
+    avoidMoves = movesFromOperand(position, operations.get('am', ''))
+
+    def solves(move):
+        if bestMoves == [] and avoidMoves == []:
+            return None
+        return (bestMoves == [] or move in bestMoves) and move not in avoidMoves
+
+    solvedSince = [None]   # time at which the search settled on a solving move
+
+    def onDepth(result):
+        if solves(result.bestMove):
+            if solvedSince[0] is None:
+                solvedSince[0] = result.seconds
+        else:
+            solvedSince[0] = None
+
+    result = ce.Engine(options = options).search(position, depth = depth, movetime = movetime, infoCallback = onDepth)
+    solved = solves(result.bestMove)
+    return {
+        'id': operations.get('id', str(number)),
+        'fen': fen,
+        'bm': operations.get('bm', ''),
+        'am': operations.get('am', ''),
+        'move': position.moveToSAN(result.bestMove) if result.bestMove is not None else '',
+        'solved': solved,
+        'score': result.score,
+        'depth': result.depth,
+        'nodes': result.nodes,
+        'seconds': round(result.seconds, 4),
+        'nps': result.getNodesPerSecond(),
+        'timeToSolution': round(solvedSince[0], 4) if solved and solvedSince[0] is not None else None,
+    }
+
+def summarize(rows):
+    '''Takes the result rows and returns a dict with the solve rate and overall search speed.'''
+    scored = [row for row in rows if row['solved'] is not None]
+    solved = [row for row in scored if row['solved']]
+    nodes = sum(row['nodes'] for row in rows)
+    seconds = sum(row['seconds'] for row in rows)
+    return {
+        'positions': len(rows),
+        'solved': len(solved),
+        'scored': len(scored),
+        'solveRate': round(len(solved) / len(scored), 4) if scored else None,
+        'nodes': nodes,
+        'seconds': round(seconds, 4),
+        'nps': int(nodes / seconds) if seconds > 0 else 0,
+        'meanTimeToSolution': round(sum(row['timeToSolution'] for row in solved) / len(solved), 4) if solved else None,
+    }
+
+def runSuite(path, depth = None, movetime = None, workers = None, options = None):
+    '''Takes the path of an EPD file, the search limits and engine options, and returns the list of result rows in file order.'''
+    tasks = []
+    with open(path) as epdFile:
+        for line in epdFile:
+            parsed = parseEPD(line)
+            if parsed is not None:
+                tasks.append((len(tasks) + 1, parsed[0], parsed[1], depth, movetime, options))
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(analysePosition, tasks))
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Search every position of an EPD test suite and report solve rate and speed.')
+    parser.add_argument('epdFile')
+    parser.add_argument('--depth', type = int, default = None, help = 'fixed search depth in plies')
+    parser.add_argument('--movetime', type = int, default = None, help = 'fixed search time per position in milliseconds')
+    parser.add_argument('--workers', type = int, default = os.cpu_count(), help = 'number of worker processes')
+    parser.add_argument('--disable', default = '', help = 'comma-separated engine options to switch off (see ChessEngine.defaultOptions)')
+    parser.add_argument('--format', choices = ['csv', 'json'], default = 'csv')
+    parser.add_argument('--output', default = None, help = 'output file (default: stdout)')
+    args = parser.parse_args()
+    if args.depth is None and args.movetime is None:
+        args.depth = 4
+
+    options = {name: False for name in args.disable.split(',') if name != ''}
+    for name in options:
+        if name not in ce.defaultOptions:
+            parser.error(f"unknown option '{name}' (choose from {', '.join(ce.defaultOptions)})")
+
+    rows = runSuite(args.epdFile, args.depth, args.movetime, args.workers, options)
+    summary = summarize(rows)
+
+    output = open(args.output, 'w', newline = '') if args.output else sys.stdout
+    if args.format == 'json':
+        json.dump({'summary': summary, 'positions': rows}, output, indent = 2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames = resultFields)
+        writer.writeheader()
+        writer.writerows(rows)
+    if output is not sys.stdout:
+        output.close()
+
+    print(f"Solved {summary['solved']}/{summary['scored']} positions, {summary['nodes']} nodes in {summary['seconds']}s "
+          f"({summary['nps']} nodes/sec).", file = sys.stderr)
+
+if __name__ == '__main__':
+    main()
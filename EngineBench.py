@@ -0,0 +1,107 @@
+'''Searches a fixed set of positions and reports node counts, speed, depth reached, move-ordering statistics and the
+solve rate on a set of tactics, plus evaluation-cache and pawn-hash hit rates, so the effect of each search feature can be measured by switching it off.
+
+Usage: python EngineBench.py [--depth 4 | --movetime 1000] [--tactics] [--disable lmr,nullMove] [--compare] [--format table|json]'''
+
+import argparse
+import json
+
+import ChessEngine as ce
+
+benchPositions = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4',
+    'r2q1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9',
+    'r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQ1RK1 w - - 0 7',
+    '2r3k1/pp3pp1/4p2p/3n4/3P4/P4N2/1P3PPP/2R3K1 w - - 0 24',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+]
+
+# Tactical test positions (from the Win At Chess suite) with their solutions in UCI format.
+tacticPositions = [
+    ('2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1', ['g3g6']),
+    ('8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1', ['b3b2']),
+    ('r1b2k1r/ppppq3/5N1p/4P2Q/4PP2/1B6/PP5P/n2K2R1 w - - 0 1', ['h5h6']),
+    ('rnbqkb1r/pppp1ppp/8/4P3/6n1/7P/PPPNPPP1/R1BQKBNR b KQkq - 0 1', ['g4e3']),
+    ('2br2k1/2q3rn/p2NppQ1/2p1P3/Pp5R/4P3/1P3PPP/3R2K1 w - - 0 1', ['h4h7']),
+    ('r4q1k/p2bR1rp/2p2Q1N/5p2/5p2/2P5/PP3PPP/R5K1 w - - 0 1', ['e7f7']),
+]
+
+def runBench(positions, depth = None, movetime = None, options = None):
+    '''Searches every position (a list of (fen, solutions) tuples, with solutions None for plain bench positions) with
+    the given limits and engine options, and returns a dict of totals.'''
+    totals = {'nodes': 0, 'seconds': 0.0, 'cutoffs': 0, 'firstMoveCutoffs': 0, 'depthTotal': 0, 'solved': 0, 'scored': 0,
+              'evalProbes': 0, 'evalHits': 0, 'evalEvictions': 0, 'pawnProbes': 0, 'pawnHits': 0, 'pawnEvictions': 0}
+    for fen, solutions in positions:
+        engine = ce.Engine(options = options)
+        result = engine.search(ce.Position.fromFEN(fen), depth = depth, movetime = movetime)
+        totals['nodes'] += result.nodes
+        totals['seconds'] += result.seconds
+        totals['cutoffs'] += engine.stats['cutoffs']
+        totals['firstMoveCutoffs'] += engine.stats['firstMoveCutoffs']
+        totals['depthTotal'] += result.depth
+        for prefix, cache in [('eval', engine.evalCache), ('pawn', engine.pawnTable)]:
+            totals[f'{prefix}Probes'] += cache.probes
+            totals[f'{prefix}Hits'] += cache.hits
+            totals[f'{prefix}Evictions'] += cache.evictions
+        if solutions is not None:
+            totals['scored'] += 1
+            totals['solved'] += result.bestMove in solutions
+    totals['seconds'] = round(totals['seconds'], 3)
+    totals['nps'] = int(totals['nodes'] / totals['seconds']) if totals['seconds'] > 0 else 0
+    totals['firstMoveCutoffRate'] = round(totals['firstMoveCutoffs'] / totals['cutoffs'], 4) if totals['cutoffs'] else None
+    for prefix in ['eval', 'pawn']:
+        rate = ce.hitRate(totals[f'{prefix}Hits'], totals[f'{prefix}Probes'])
+        totals[f'{prefix}HitRate'] = round(rate, 4) if rate is not None else None
+    totals['averageDepth'] = round(totals.pop('depthTotal') / len(positions), 2)
+    totals['depthPerSecond'] = round(totals['averageDepth'] * len(positions) / totals['seconds'], 2) if totals['seconds'] > 0 else None
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Search a fixed position set and report nodes, speed, depth and cutoff rates.')
+    parser.add_argument('--depth', type = int, default = None, help = 'fixed depth per position (default 4)')
+    parser.add_argument('--movetime', type = int, default = None, help = 'fixed time per position in milliseconds')
+    parser.add_argument('--tactics', action = 'store_true', help = 'search the tactics set and report the solve rate')
+    parser.add_argument('--disable', default = '', help = 'comma-separated engine options to switch off')
+    parser.add_argument('--compare', action = 'store_true', help = 'also run once with each option switched off in turn')
+    parser.add_argument('--format', choices = ['table', 'json'], default = 'table')
+    args = parser.parse_args()
+
+    disabled = [name for name in args.disable.split(',') if name != '']
+    for name in disabled:
+        if name not in ce.defaultOptions:
+            parser.error(f"unknown option '{name}' (choose from {', '.join(ce.defaultOptions)})")
+    baseOptions = {name: False for name in disabled}
+    if args.depth is None and args.movetime is None:
+        args.depth = 4
+    positions = tacticPositions if args.tactics else [(fen, None) for fen in benchPositions]
+
+    configurations = [('baseline' if not disabled else f"-{',-'.join(disabled)}", baseOptions)]
+    if args.compare:
+        for name in ce.defaultOptions:
+            if name not in disabled and name != 'debugEval':
+                configurations.append((f'-{name}', dict(baseOptions, **{name: False})))
+        configurations.append(('all off', {name: False for name in ce.defaultOptions}))
+
+    rows = []
+    for label, options in configurations:
+        rows.append(dict(configuration = label, **runBench(positions, args.depth, args.movetime, options)))
+
+    if args.format == 'json':
+        print(json.dumps(rows, indent = 2))
+        return
+    print(f"{'configuration':<20}{'nodes':>12}{'seconds':>10}{'nps':>10}{'depth':>8}{'cutoffs':>10}{'first-move %':>14}"
+          f"{'solved':>8}{'eval hit %':>12}{'evictions':>11}{'pawn hit %':>12}{'evictions':>11}")
+    for row in rows:
+        rate = f"{100 * row['firstMoveCutoffRate']:.1f}" if row['firstMoveCutoffRate'] is not None else '-'
+        solved = f"{row['solved']}/{row['scored']}" if row['scored'] else '-'
+        evalRate = f"{100 * row['evalHitRate']:.1f}" if row['evalHitRate'] is not None else '-'
+        pawnRate = f"{100 * row['pawnHitRate']:.1f}" if row['pawnHitRate'] is not None else '-'
+        print(f"{row['configuration']:<20}{row['nodes']:>12}{row['seconds']:>10}{row['nps']:>10}{row['averageDepth']:>8}"
+              f"{row['cutoffs']:>10}{rate:>14}{solved:>8}{evalRate:>12}{row['evalEvictions']:>11}{pawnRate:>12}"
+              f"{row['pawnEvictions']:>11}")
+
+if __name__ == '__main__':
+    main()
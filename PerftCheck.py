@@ -0,0 +1,54 @@
+'''Checks the legal move generator against the published perft counts of six standard test positions (the start
+position, Kiwipete and positions 3 to 6 from the Chess Programming Wiki). Each position is counted with
+ChessEngine.perft, so both ChessObjects.generateLegalMoves and Position make/unmake are exercised. Exits with status 1
+if any count differs.
+
+Usage: python PerftCheck.py [--depth 3]'''
+
+import argparse
+import sys
+import time
+
+import ChessEngine as ce
+
+# (name, FEN, perft counts for depth 1, 2, ...)
+perftPositions = [
+    ('start', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', [20, 400, 8902, 197281]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862]),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238]),
+    ('position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467]),
+    ('position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379]),
+    ('position 6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', [46, 2079, 89890]),
+]
+
+def checkPosition(fen, expected, maxDepth):
+    '''Takes a FEN, its expected perft counts and the deepest depth to check, and returns a list of
+    (depth, expected, counted) tuples, one per depth checked.'''
+    position = ce.Position.fromFEN(fen)
+    results = []
+    for depth, count in enumerate(expected[:maxDepth], start = 1):
+        results.append((depth, count, ce.perft(position, depth)))
+        if position.toFEN() != ce.Position.fromFEN(fen).toFEN():
+            raise RuntimeError(f'perft did not restore the position {fen}')
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Check the legal move generator against known perft counts.')
+    parser.add_argument('--depth', type = int, default = 3, help = 'deepest perft depth to check (default 3)')
+    args = parser.parse_args()
+
+    failures = 0
+    for name, fen, expected in perftPositions:
+        startTime = time.perf_counter()
+        results = checkPosition(fen, expected, args.depth)
+        seconds = time.perf_counter() - startTime
+        for depth, count, counted in results:
+            status = 'ok' if counted == count else 'FAIL'
+            failures += counted != count
+            print(f'{name:<12}depth {depth}{counted:>10}{count:>10}  {status}')
+        print(f'{name:<12}{seconds:.2f} s')
+    print(f'{failures} mismatches')
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
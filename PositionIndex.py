@@ -0,0 +1,324 @@
+'''On-disk index of the positions reached in a collection of games, for "which games reached this position" queries and
+opening-explorer move statistics.
+
+Games are read from PGN files and replayed move by move. Every position is recorded as a fixed-size record
+(position hash, game id, ply, next move, result). Records are sorted in bounded-size runs that are merged into a
+single file, so building streams through any number of games in bounded memory. The finished file is
+memory-mapped and searched by binary search on the position hash. A game table written next to it (the index path
+plus '.games') maps each game id back to its PGN file, byte offset and White, Black and Event tags.
+
+Usage: python PositionIndex.py build games.pgn [more.pgn ...] --output games.idx [--chunk-records 500000]
+       python PositionIndex.py query games.idx [--fen FEN | --moves "e2e4 e7e5"] [--limit 20]'''
+
+import argparse
+import heapq
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import tempfile
+
+import ChessObjects as co
+import ChessEngine as ce
+
+# Record layout: position hash, game id, ply, next move (see encodeMove), result (1 white win, 0 draw, -1 black win,
+# 2 unknown). Records are sorted by hash, then game id, then ply.
+recordFormat = struct.Struct('<QIHHb')
+headerFormat = struct.Struct('<8sQ')
+indexMagic = b'CHESSIDX'
+noMove = 0xFFFF
+promotionCodes = {'': 0, 'q': 1, 'r': 2, 'b': 3, 'n': 4}
+promotionLetters = {code: letter for letter, code in promotionCodes.items()}
+resultCodes = {'1-0': 1, '1/2-1/2': 0, '0-1': -1}
+mergeFanIn = 64         # Run files merged at once; more runs are merged in several passes.
+# Game table layout: header (magic, game count), one u64 offset per game id, then one JSON line per game. The offsets
+# are relative to the start of the JSON lines.
+gameTableMagic = b'CHESSGMS'
+offsetFormat = struct.Struct('<Q')
+gameTags = ['White', 'Black', 'Event']
+
+def encodeMove(UCImove):
+    '''Packs a UCI move into 15 bits: from square, to square and promotion piece.'''
+    return co.squareIndex(UCImove[:2]) | (co.squareIndex(UCImove[2:4]) << 6) | (promotionCodes[UCImove[4:]] << 12)
+
+def decodeMove(code):
+    '''Reverses encodeMove(). Returns None for the end-of-game marker.'''
+    if code == noMove:
+        return None
+    return f'{co.squareName(code & 63)}{co.squareName((code >> 6) & 63)}{promotionLetters[code >> 12]}'
+
+def positionKey(position: ce.Position):
+    '''Returns the hash a position is indexed under: its Zobrist hash without the en passant term when no pawn can
+    capture en passant, so FENs that list (or omit) an uncapturable en passant square find the same games.'''
+    if position.epIndex is None:
+        return position.hash
+    pawn = 'P' if position.toMove == 'white' else 'p'
+    for square in co.pawnAttacks[co.opponentColor[position.toMove]][position.epIndex]:
+        if position.letters[square] == pawn:
+            return position.hash
+    return position.hash ^ ce.zobristEnPassant[position.epIndex % 8]
+
+def gameTablePath(indexPath):
+    '''Returns the path of the game table that belongs to an index file.'''
+    return indexPath + '.games'
+
+def readPGNGames(pgnFile):
+    '''Takes a PGN file opened in binary mode and yields a (byte offset, tags, SAN moves) tuple for each game, where
+    the offset is where the game starts in the file. Comments, variations, NAGs and move numbers are skipped.'''
+    tags = {}
+    movetext = []
+    gameStart = None
+    offset = 0
+    for rawLine in pgnFile:
+        lineStart = offset
+        offset += len(rawLine)
+        line = rawLine.decode('utf-8', errors = 'replace').strip()
+        if line.startswith('['):
+            if movetext:
+                yield gameStart, tags, parseMovetext(' '.join(movetext))
+                tags, movetext, gameStart = {}, [], None
+            match = re.match(r'\[(\w+)\s+"(.*)"\]', line)
+            if match:
+                tags[match.group(1)] = match.group(2)
+        elif line != '' and not line.startswith('%'):
+            movetext.append(line)
+        else:
+            continue
+        if gameStart is None:
+            gameStart = lineStart
+    if movetext or tags:
+        yield gameStart, tags, parseMovetext(' '.join(movetext))
+
+def parseMovetext(movetext):
+    '''Takes PGN movetext and returns the list of SAN moves of the main line.'''
+    movetext = re.sub(r'\{[^}]*\}|;[^\n]*', ' ', movetext)
+    while '(' in movetext:      # Remove variations, innermost first.
+        stripped = re.sub(r'\([^()]*\)', ' ', movetext)
+        if stripped == movetext:
+            break
+        movetext = stripped
+    moves = []
+    for token in movetext.split():
+        token = re.sub(r'^\d+\.+', '', token)
+        if token == '' or token.startswith('$') or token in ['1-0', '0-1', '1/2-1/2', '*']:
+            continue
+        moves.append(token)
+    return moves
+
+def gameRecords(gameId, tags, sanMoves):
+    '''Replays one game and yields a record tuple for every position in it. Replaying stops at the first move that
+    is not legal.'''
+    if 'FEN' in tags:
+        position = ce.Position.fromGame(co.gameFromFEN(tags['FEN']))
+    else:
+        position = ce.Position.fromGame(co.chessGame(co.Board('standard')))
+    result = resultCodes.get(tags.get('Result'), 2)
+    for ply, san in enumerate(sanMoves):
+        move = position.sanToMove(san)
+        if move is None:
+            return
+        yield (positionKey(position), gameId, ply, encodeMove(move), result)
+        position.makeMove(move)
+    yield (positionKey(position), gameId, len(sanMoves), noMove, result)
+
+def writeRun(records, directory):
+    '''Sorts a chunk of records and writes it to a temporary run file. Returns the file path.'''
+    records.sort()
+    handle, path = tempfile.mkstemp(suffix = '.run', dir = directory)
+    with os.fdopen(handle, 'wb') as runFile:
+        for record in records:
+            runFile.write(recordFormat.pack(*record))
+    return path
+
+def readRun(path, blockRecords = 8192):
+    '''Yields the records of a run file, reading it in blocks.'''
+    with open(path, 'rb') as runFile:
+        while True:
+            block = runFile.read(recordFormat.size * blockRecords)
+            if not block:
+                return
+            yield from recordFormat.iter_unpack(block)
+
+def mergeRuns(runPaths, directory):
+    '''Merges the oldest mergeFanIn run files into one new run until at most mergeFanIn are left, so the number of open
+    files and read buffers stays bounded. Updates 'runPaths' in place, so the caller can always remove what is left.'''
+    while len(runPaths) > mergeFanIn:
+        group = runPaths[:mergeFanIn]
+        handle, path = tempfile.mkstemp(suffix = '.run', dir = directory)
+        runPaths.append(path)
+        with os.fdopen(handle, 'wb') as runFile:
+            for record in heapq.merge(*[readRun(groupPath) for groupPath in group]):
+                runFile.write(recordFormat.pack(*record))
+        for groupPath in group:
+            runPaths.remove(groupPath)
+            os.remove(groupPath)
+
+def writeGameTable(path, offsetsFile, linesFile, count):
+    '''Writes the game table from temporary files holding the per-game offsets and JSON lines.'''
+    offsetsFile.seek(0)
+    linesFile.seek(0)
+    with open(path, 'wb') as tableFile:
+        tableFile.write(headerFormat.pack(gameTableMagic, count))
+        shutil.copyfileobj(offsetsFile, tableFile)
+        shutil.copyfileobj(linesFile, tableFile)
+
+def buildIndex(pgnPaths, outputPath, chunkRecords = 500000):
+    '''Replays every game in the PGN files and writes the sorted index to 'outputPath' and its game table to
+    gameTablePath(outputPath). At most 'chunkRecords' records are held in memory at once, and at most mergeFanIn run
+    files are merged at a time. Returns the number of games and records indexed.'''
+    directory = os.path.dirname(os.path.abspath(outputPath))
+    runPaths = []
+    records = []
+    gameId = 0
+    offsetsFile = tempfile.TemporaryFile(dir = directory)
+    linesFile = tempfile.TemporaryFile(dir = directory)
+    try:
+        for pgnPath in pgnPaths:
+            with open(pgnPath, 'rb') as pgnFile:
+                for offset, tags, sanMoves in readPGNGames(pgnFile):
+                    records.extend(gameRecords(gameId, tags, sanMoves))
+                    offsetsFile.write(offsetFormat.pack(linesFile.tell()))
+                    gameInfo = dict({'file': pgnPath, 'offset': offset}, **{tag: tags.get(tag, '?') for tag in gameTags})
+                    linesFile.write(json.dumps(gameInfo).encode('utf-8') + b'\n')
+                    gameId += 1
+                    if len(records) >= chunkRecords:
+                        runPaths.append(writeRun(records, directory))
+                        records = []
+        if records:
+            runPaths.append(writeRun(records, directory))
+            records = []
+
+        mergeRuns(runPaths, directory)
+        count = 0
+        with open(outputPath, 'wb') as indexFile:
+            indexFile.write(headerFormat.pack(indexMagic, 0))
+            for record in heapq.merge(*[readRun(path) for path in runPaths]):
+                indexFile.write(recordFormat.pack(*record))
+                count += 1
+            indexFile.seek(0)
+            indexFile.write(headerFormat.pack(indexMagic, count))
+        writeGameTable(gameTablePath(outputPath), offsetsFile, linesFile, gameId)
+    finally:
+        offsetsFile.close()
+        linesFile.close()
+        for path in runPaths:
+            os.remove(path)
+    return gameId, count
+
+class PositionIndex:
+    '''A built index file and its game table, memory-mapped for lookups. Takes the path of the index file.'''
+    def __init__(self, path):
+        self.indexFile = open(path, 'rb')
+        self.data = mmap.mmap(self.indexFile.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, self.count = headerFormat.unpack_from(self.data, 0)
+        if magic != indexMagic:
+            raise ValueError(f'{path} is not a position index file')
+        self.tableFile = open(gameTablePath(path), 'rb')
+        self.table = mmap.mmap(self.tableFile.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, self.gameCount = headerFormat.unpack_from(self.table, 0)
+        if magic != gameTableMagic:
+            raise ValueError(f'{gameTablePath(path)} is not a game table file')
+
+    def close(self):
+        self.data.close()
+        self.indexFile.close()
+        self.table.close()
+        self.tableFile.close()
+
+    def gameInfo(self, gameId):
+        '''Returns a dict with the PGN file, byte offset and White, Black and Event tags of a game id.'''
+        linesStart = headerFormat.size + self.gameCount * offsetFormat.size
+        start = linesStart + offsetFormat.unpack_from(self.table, headerFormat.size + gameId * offsetFormat.size)[0]
+        return json.loads(self.table[start:self.table.find(b'\n', start)])
+
+    def recordAt(self, idx):
+        return recordFormat.unpack_from(self.data, headerFormat.size + idx * recordFormat.size)
+
+    def hashAt(self, idx):
+        return struct.unpack_from('<Q', self.data, headerFormat.size + idx * recordFormat.size)[0]
+
+    def records(self, positionHash):
+        '''Yields every (hash, game id, ply, next move, result) record for the position hash, found by binary search.'''
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.hashAt(middle) < positionHash:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.count and self.hashAt(low) == positionHash:
+            yield self.recordAt(low)
+            low += 1
+
+    def games(self, position: ce.Position):
+        '''Returns a list of (game id, ply) pairs for every game that reached the position.'''
+        return [(record[1], record[2]) for record in self.records(positionKey(position))]
+
+    def moveStatistics(self, position: ce.Position):
+        '''Returns a list of dicts, one per move played from the position (most played first), with the number of games,
+        white wins, draws, black wins and the score percentage for the side to move.'''
+        statistics = {}
+        for positionHash, gameId, ply, moveCode, result in self.records(positionKey(position)):
+            move = decodeMove(moveCode)
+            if move is None:
+                continue
+            entry = statistics.setdefault(move, {'move': move, 'san': position.moveToSAN(move), 'games': 0,
+                                                 'whiteWins': 0, 'draws': 0, 'blackWins': 0})
+            entry['games'] += 1
+            if result == 1:
+                entry['whiteWins'] += 1
+            elif result == 0:
+                entry['draws'] += 1
+            elif result == -1:
+                entry['blackWins'] += 1
+        for entry in statistics.values():
+            decided = entry['whiteWins'] + entry['draws'] + entry['blackWins']
+            wins = entry['whiteWins'] if position.toMove == 'white' else entry['blackWins']
+            entry['scorePercent'] = round(100 * (wins + entry['draws'] / 2) / decided, 1) if decided else None
+        return sorted(statistics.values(), key = lambda entry: entry['games'], reverse = True)
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Build or query an index of the positions reached in PGN games.')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    build = commands.add_parser('build', help = 'index PGN files')
+    build.add_argument('pgnFiles', nargs = '+')
+    build.add_argument('--output', required = True)
+    build.add_argument('--chunk-records', type = int, default = 500000, help = 'records sorted in memory at once')
+    query = commands.add_parser('query', help = 'list games and move statistics for a position')
+    query.add_argument('indexFile')
+    query.add_argument('--fen', default = None)
+    query.add_argument('--moves', default = '', help = 'UCI moves played from the FEN or the starting position')
+    query.add_argument('--limit', type = int, default = 20, help = 'number of games to list')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        games, records = buildIndex(args.pgnFiles, args.output, args.chunk_records)
+        print(f'Indexed {records} positions from {games} games into {args.output}.')
+        return
+
+    if args.fen is not None:
+        position = ce.Position.fromFEN(args.fen)
+    else:
+        position = ce.Position.fromGame(co.chessGame(co.Board('standard')))
+    for move in args.moves.split():
+        if move not in position.legalMoves():
+            parser.error(f"'{move}' is not a legal move in {position.toFEN()}")
+        position.makeMove(move)
+
+    index = PositionIndex(args.indexFile)
+    games = index.games(position)
+    print(f'{len(games)} games reached {position.toFEN()}')
+    for gameId, ply in games[:args.limit]:
+        info = index.gameInfo(gameId)
+        print(f"  game {gameId}, ply {ply}: {info['White']} - {info['Black']}, {info['Event']} "
+              f"({info['file']}, byte {info['offset']})")
+    print(f"{'move':<8}{'games':>8}{'white':>8}{'draws':>8}{'black':>8}{'score %':>9}")
+    for entry in index.moveStatistics(position):
+        score = entry['scorePercent'] if entry['scorePercent'] is not None else '-'
+        print(f"{entry['san']:<8}{entry['games']:>8}{entry['whiteWins']:>8}{entry['draws']:>8}{entry['blackWins']:>8}{score:>9}")
+    index.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+'''Plays engine-vs-engine matches between ChessEngine configurations to measure playing strength. Every pair of
+configurations plays each opening twice with colors swapped, games are played in parallel on a process pool, and
+each game goes through chessGame so it is adjudicated by the same result logic as the GUI.
+
+An engine configuration is written as name:setting=value,... where the settings are 'depth', 'movetime'
+(milliseconds), 'hash' (MB) and any ChessEngine.defaultOptions toggle set to on/off, eg. 'nolmr:depth=3,lmr=off'.
+
+Usage: python Tournament.py --engine base:depth=3 --engine nolmr:depth=3,lmr=off [--openings openings.txt]
+                            [--rounds 1] [--max-plies 200] [--workers 4] [--output games.json]'''
+
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+
+import ChessObjects as co
+import ChessEngine as ce
+
+# Balanced opening positions, each played once with either configuration as white.
+openingPositions = [
+    'rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2',
+    'rnbqkb1r/pppppppp/5n2/8/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 1 2',
+    'rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2',
+    'rnbqkbnr/ppp1pppp/8/3p4/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 0 2',
+    'rnbqkbnr/pppp1ppp/4p3/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2',
+    'rnbqkbnr/pp1ppppp/2p5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2',
+    'rnbqkbnr/pppppppp/8/8/2P5/8/PP1PPPPP/RNBQKBNR b KQkq - 0 1',
+    'rnbqkbnr/pppppppp/8/8/8/5N2/PPPPPPPP/RNBQKB1R b KQkq - 1 1',
+]
+
+adjudicatedResult = 'adjudicated (max plies)'     # resultType of games stopped at --max-plies
+
+def parseEngine(text):
+    '''Takes an engine configuration string (eg. 'nolmr:depth=3,lmr=off') and returns a configuration dict.'''
+    name, _, settings = text.partition(':')
+    config = {'name': name, 'depth': None, 'movetime': None, 'hash': 16, 'options': {}}
+    for setting in settings.split(','):
+        if setting == '':
+            continue
+        key, _, value = setting.partition('=')
+        if key in ['depth', 'movetime', 'hash']:
+            config[key] = int(value)
+        elif key in ce.defaultOptions:
+            config['options'][key] = value.lower() in ['on', 'true', '1']
+        else:
+            raise ValueError(f"unknown engine setting '{key}' in '{text}'")
+    if config['depth'] is None and config['movetime'] is None:
+        config['depth'] = 3
+    return config
+
+def playGame(task):
+    '''Takes a (game number, opening FEN, white configuration, black configuration, maximum plies) tuple, plays the
+    game and returns a dict with its moves, result and per-move statistics. Runs inside a worker process.'''
+    number, fen, white, black, maxPlies = task
+    game = co.gameFromFEN(fen)
+    position = ce.Position.fromGame(game)
+    engines = {'white': ce.Engine(hashSizeMB = white['hash'], options = white['options']),
+               'black': ce.Engine(hashSizeMB = black['hash'], options = black['options'])}
+    configs = {'white': white, 'black': black}
+    moveStats = []
+
+    with contextlib.redirect_stdout(io.StringIO()):     # chessGame prints the result when the game ends.
+        while game.resultType is None:
+            if len(moveStats) >= maxPlies:     # Adjudicate overlong games as draws, distinct from agreed draws.
+                game.scoreWhite = game.scoreBlack = 0.5
+                game.resultType = adjudicatedResult
+                break
+            color = game.getTurn()
+            config = configs[color]
+            result = engines[color].search(position, depth = config['depth'], movetime = config['movetime'])
+            message = game.move(result.bestMove)
+            if message is not None:
+                raise RuntimeError(f"{config['name']} played {result.bestMove} in {position.toFEN()}: {message}")
+            position.makeMove(result.bestMove)
+            moveStats.append({'color': color, 'move': result.bestMove, 'seconds': round(result.seconds, 4),
+                              'nodes': result.nodes, 'depth': result.depth, 'score': result.score})
+
+    return {'game': number, 'opening': fen, 'white': white['name'], 'black': black['name'],
+            'scoreWhite': game.scoreWhite, 'resultType': game.resultType, 'moves': moveStats}
+
+def eloDifference(score, games):
+    '''Takes a score fraction and the number of games, and returns the Elo difference it implies. The score is clamped
+    to between half a point and one game less half a point, so a perfect or zero score gives a finite bound.'''
+    if games == 0:
+        return 0.0
+    score = min(max(score, 0.5 / games), 1 - 0.5 / games)
+    return -400 * math.log10(1 / score - 1)
+
+def matchSummary(games, first, second):
+    '''Takes the game records of a match between two configuration names and returns a dict with the wins, draws and
+    losses of 'first', its Elo difference and the 95% error bar of the difference. A perfect or zero score is reported
+    as the clamped bound (see eloDifference) with 'eloIsBound' set and no error bar.'''
+    scores = []
+    for record in games:
+        if record['white'] == first and record['black'] == second:
+            scores.append(record['scoreWhite'])
+        elif record['white'] == second and record['black'] == first:
+            scores.append(1 - record['scoreWhite'])
+    count = len(scores)
+    mean = sum(scores) / count if count else 0.5
+    deviation = math.sqrt(sum((score - mean) ** 2 for score in scores) / count) if count else 0.0
+    margin = 1.96 * deviation / math.sqrt(count) if count else 0.0
+    elo = eloDifference(mean, count)
+    low, high = eloDifference(mean - margin, count), eloDifference(mean + margin, count)
+    isBound = count > 0 and mean in [0, 1]
+    return {'first': first, 'second': second, 'games': count, 'wins': scores.count(1), 'draws': scores.count(0.5),
+            'losses': scores.count(0), 'score': round(mean, 4), 'elo': round(elo, 1),
+            'errorBar': None if isBound else round((high - low) / 2, 1), 'eloIsBound': isBound}
+
+def engineSummary(games, name):
+    '''Takes the game records and a configuration name and returns its average nodes/sec, time per move and depth.'''
+    moves = [move for record in games for move in record['moves'] if record[move['color']] == name]
+    nodes = sum(move['nodes'] for move in moves)
+    seconds = sum(move['seconds'] for move in moves)
+    return {'name': name, 'moves': len(moves), 'nps': int(nodes / seconds) if seconds > 0 else 0,
+            'secondsPerMove': round(seconds / len(moves), 4) if moves else None,
+            'averageDepth': round(sum(move['depth'] for move in moves) / len(moves), 2) if moves else None}
+
+def runTournament(configs, openings, rounds = 1, maxPlies = 200, workers = None):
+    '''Plays every pair of configurations on every opening with colors swapped, 'rounds' times over, and returns the
+    list of game records in scheduling order.'''
+    tasks = []
+    for _ in range(rounds):
+        for first, second in itertools.combinations(configs, 2):
+            for fen in openings:
+                tasks.append((len(tasks) + 1, fen, first, second, maxPlies))
+                tasks.append((len(tasks) + 1, fen, second, first, maxPlies))
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(playGame, tasks))
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Play engine configurations against each other and report Elo differences.')
+    parser.add_argument('--engine', action = 'append', required = True,
+                        help = "configuration as name:setting=value,... (repeat for each engine)")
+    parser.add_argument('--openings', default = None, help = 'file with one opening FEN per line (default: built-in set)')
+    parser.add_argument('--rounds', type = int, default = 1, help = 'times each opening pair is played')
+    parser.add_argument('--max-plies', type = int, default = 200, help = 'plies after which a game is adjudicated a draw')
+    parser.add_argument('--workers', type = int, default = os.cpu_count(), help = 'number of worker processes')
+    parser.add_argument('--output', default = None, help = 'write every game record and the summary to this JSON file')
+    args = parser.parse_args()
+
+    try:
+        configs = [parseEngine(text) for text in args.engine]
+    except ValueError as error:
+        parser.error(str(error))
+    if len(configs) < 2:
+        parser.error('at least two --engine configurations are needed')
+    if len({config['name'] for config in configs}) != len(configs):
+        parser.error('engine names must be unique')
+
+    openings = openingPositions
+    if args.openings is not None:
+        with open(args.openings) as openingsFile:
+            openings = [' '.join(line.split()[:6]) for line in openingsFile if line.strip() and not line.startswith('#')]
+
+    games = runTournament(configs, openings, args.rounds, args.max_plies, args.workers)
+    matches = [matchSummary(games, first['name'], second['name']) for first, second in itertools.combinations(configs, 2)]
+    engines = [engineSummary(games, config['name']) for config in configs]
+
+    if args.output is not None:
+        with open(args.output, 'w') as outputFile:
+            json.dump({'engines': configs, 'matches': matches, 'speed': engines, 'games': games}, outputFile, indent = 2,
+                      allow_nan = False)
+
+    print(f"{'match':<30}{'games':>7}{'+':>5}{'=':>5}{'-':>5}{'score':>8}{'elo':>16}")
+    for match in matches:
+        if match['eloIsBound']:
+            elo = f"{'>' if match['elo'] > 0 else '<'}{match['elo']}"
+        else:
+            elo = f"{match['elo']} +/- {match['errorBar']}"
+        print(f"{match['first'] + ' vs ' + match['second']:<30}{match['games']:>7}{match['wins']:>5}{match['draws']:>5}"
+              f"{match['losses']:>5}{match['score']:>8}{elo:>16}")
+    print()
+    print(f"{'engine':<20}{'moves':>8}{'nps':>10}{'s/move':>10}{'depth':>8}")
+    for engine in engines:
+        print(f"{engine['name']:<20}{engine['moves']:>8}{engine['nps']:>10}{engine['secondsPerMove']:>10}"
+              f"{engine['averageDepth']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+'''UCI (Universal Chess Interface) front end for ChessEngine, so the engine can be run by match runners and chess GUIs
+over stdin/stdout. The search runs in a background thread, so 'stop', 'isready' and 'ponderhit' are answered
+while it is thinking.
+
+Usage: python UCIEngine.py'''
+
+import sys
+import threading
+import time
+
+import ChessEngine as ce
+
+startingFEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+def formatScore(score):
+    '''Returns a search score in UCI form ('cp 35' or 'mate -3').'''
+    if score >= ce.MATE_BOUND:
+        return f'mate {(ce.MATE_SCORE - score + 1) // 2}'
+    if score <= -ce.MATE_BOUND:
+        return f'mate -{(ce.MATE_SCORE + score) // 2}'
+    return f'cp {score}'
+
+def allocateMovetime(position, goArgs):
+    '''Takes the position and the parsed 'go' arguments and returns the milliseconds to spend on this move from the
+    clock ('wtime'/'btime', 'winc'/'binc', 'movestogo'), or None if no clock was given.'''
+    remaining = goArgs.get('wtime' if position.toMove == 'white' else 'btime')
+    if remaining is None:
+        return None
+    increment = goArgs.get('winc' if position.toMove == 'white' else 'binc', 0)
+    movesToGo = goArgs.get('movestogo', 30)
+    movetime = remaining // max(1, movesToGo) + (3 * increment) // 4
+    return max(10, min(movetime, remaining // 2) - 20)     # Keep a margin for clock checks and communication.
+
+class UCIEngine:
+    '''Reads UCI commands and writes responses. Takes optional 'inputStream' and 'outputStream' arguments
+    (stdin and stdout by default).'''
+    def __init__(self, inputStream = sys.stdin, outputStream = sys.stdout):
+        self.inputStream = inputStream
+        self.outputStream = outputStream
+        self.outputLock = threading.Lock()
+        self.engine = ce.Engine(hashSizeMB = 16)
+        self.position = ce.Position.fromFEN(startingFEN)
+        self.searchThread = None
+        self.releaseBestMove = threading.Event()    # Held clear while an infinite or ponder search must not report yet.
+        self.ponderMovetime = None
+        self.ponderHasLimit = False     # The ponder search has its own depth or node limit.
+
+    def send(self, line):
+        '''Writes one line to the GUI.'''
+        with self.outputLock:
+            self.outputStream.write(line + '\n')
+            self.outputStream.flush()
+
+    def run(self):
+        '''Processes commands until 'quit' or the end of input.'''
+        for line in self.inputStream:
+            try:
+                if self.handle(line.strip()) is False:
+                    break
+            except (ValueError, KeyError, IndexError, TypeError) as error:     # A malformed command must not end the engine.
+                self.send(f'info string ignored command {line.strip()!r}: {error}')
+        self.stopSearch()
+
+    def handle(self, line):
+        '''Processes one command. Returns False for 'quit'.'''
+        words = line.split()
+        if words == []:
+            return True
+        command = words[0]
+        if command == 'uci':
+            self.send('id name Chess-Pygame')
+            self.send('id author jnbradley828')
+            self.send(f'option name Hash type spin default {self.engine.table.sizeMB} min 1 max 1024')
+            self.send('option name Clear Hash type button')
+            self.send('option name Ponder type check default false')
+            for name, enabled in ce.defaultOptions.items():     # Search feature toggles, eg. 'setoption name lmr value false'.
+                self.send(f'option name {name} type check default {str(enabled).lower()}')
+            self.send('uciok')
+        elif command == 'isready':
+            self.send('readyok')
+        elif command == 'setoption':
+            self.setOption(words)
+        elif command == 'ucinewgame':
+            self.stopSearch()
+            self.engine.clearCaches()
+        elif command == 'position':
+            self.stopSearch()
+            self.setPosition(words)
+        elif command == 'go':
+            self.stopSearch()
+            self.go(words)
+        elif command == 'stop':
+            self.stopSearch()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'd':
+            self.send(self.position.toFEN())
+        elif command == 'quit':
+            return False
+        return True
+
+    def setOption(self, words):
+        '''Handles 'setoption name <name> [value <value>]'.'''
+        line = ' '.join(words[1:])
+        name, _, value = line.partition(' value ')
+        name = name.replace('name ', '', 1).strip().lower()
+        if name == 'hash':
+            self.stopSearch()
+            try:
+                sizeMB = int(value)
+            except ValueError:
+                return      # Ignore a malformed value, as UCI engines do.
+            self.engine.table.resize(max(1, min(1024, sizeMB)))
+        elif name == 'clear hash':
+            self.stopSearch()
+            self.engine.clearCaches()
+        else:
+            for option in ce.defaultOptions:
+                if option.lower() == name:
+                    self.stopSearch()
+                    self.engine.setOption(option, value.strip().lower() == 'true')
+
+    def setPosition(self, words):
+        '''Handles 'position startpos|fen <fen> [moves <move> ...]'.'''
+        if 'moves' in words:
+            movesIdx = words.index('moves')
+            moves = words[movesIdx + 1:]
+        else:
+            movesIdx = len(words)
+            moves = []
+        if len(words) > 1 and words[1] == 'fen':
+            self.position = ce.Position.fromFEN(' '.join(words[2:movesIdx]))
+        else:
+            self.position = ce.Position.fromFEN(startingFEN)
+        for move in moves:
+            self.position.makeMove(move)
+
+    def go(self, words):
+        '''Handles 'go' with depth, nodes, movetime, wtime/btime/winc/binc/movestogo, infinite, ponder or perft.'''
+        goArgs = {}
+        for idx, word in enumerate(words[1:-1], start = 1):
+            if word in ['depth', 'nodes', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo', 'perft']:
+                try:
+                    goArgs[word] = int(words[idx + 1])
+                except ValueError:
+                    pass    # Ignore a malformed value and search without that limit.
+
+        if 'perft' in goArgs:
+            self.engine.stopEvent.clear()
+            self.searchThread = threading.Thread(target = self.runPerft, args = (self.position.copy(), goArgs['perft']),
+                                                 daemon = True)
+            self.searchThread.start()
+            return
+
+        movetime = goArgs.get('movetime', allocateMovetime(self.position, goArgs))
+        pondering = 'ponder' in words
+        self.ponderMovetime = movetime if pondering else None
+        self.ponderHasLimit = 'depth' in goArgs or 'nodes' in goArgs
+        if pondering or 'infinite' in words:
+            self.releaseBestMove.clear()
+            movetime = None
+        else:
+            self.releaseBestMove.set()
+
+        self.engine.stopEvent.clear()
+        self.engine.searchStarted.clear()
+        self.searchThread = threading.Thread(target = self.runSearch,
+                                             args = (self.position, goArgs.get('depth'), movetime, goArgs.get('nodes')),
+                                             daemon = True)
+        self.searchThread.start()
+
+    def runSearch(self, position, depth, movetime, nodes):
+        '''Runs in the search thread: searches, reports each depth, then reports the best move.'''
+        def onDepth(result):
+            self.send(f'info depth {result.depth} score {formatScore(result.score)} nodes {result.nodes} '
+                      f'nps {result.getNodesPerSecond()} time {int(result.seconds * 1000)} pv {" ".join(result.pv)}')
+
+        result = self.engine.search(position, depth = depth, movetime = movetime, nodes = nodes, infoCallback = onDepth)
+        self.releaseBestMove.wait()     # UCI: an infinite or ponder search reports only after 'stop' or 'ponderhit'.
+        if result.bestMove is None:
+            self.send('bestmove 0000')
+        elif len(result.pv) > 1:
+            self.send(f'bestmove {result.bestMove} ponder {result.pv[1]}')
+        else:
+            self.send(f'bestmove {result.bestMove}')
+
+    def runPerft(self, position, depth):
+        '''Runs in the search thread: prints the perft count below each root move and the total. After 'stop' the
+        total covers only the root moves that were finished.'''
+        startTime = time.perf_counter()
+        total = 0
+        for move in position.legalMoves():
+            undo = position.makeMove(move)
+            try:
+                count = ce.perft(position, depth - 1, self.engine.stopEvent)
+            except ce.SearchStopped:
+                break
+            position.unmakeMove(undo)
+            total += count
+            self.send(f'{move}: {count}')
+        seconds = time.perf_counter() - startTime
+        self.send('')
+        self.send(f'Nodes searched: {total}')
+        self.send(f'info nodes {total} time {int(seconds * 1000)} nps {int(total / seconds) if seconds > 0 else 0}')
+
+    def ponderhit(self):
+        '''The opponent played the expected move: the ponder search continues as a normal timed search, or to its own
+        depth or node limit. A ponder search with no limit at all is stopped.'''
+        if self.searchThread is None or not self.searchThread.is_alive():
+            return
+        if self.ponderMovetime is not None:
+            self.engine.searchStarted.wait()
+            self.engine.setMovetime(self.ponderMovetime)
+        elif not self.ponderHasLimit:
+            self.engine.stop()
+        self.releaseBestMove.set()
+
+    def stopSearch(self):
+        '''Stops a running search and waits for it to report its best move.'''
+        if self.searchThread is not None and self.searchThread.is_alive():
+            self.engine.stop()
+            self.releaseBestMove.set()
+            self.searchThread.join()
+        self.searchThread = None
+
+if __name__ == '__main__':
+    UCIEngine().run()
@@ -0,0 +1,236 @@
+'''Headless benchmark for the main.py game window. Replays a script of clicks and keypresses through the SDL dummy
+video driver and records per-frame times (p50/p95/p99) and rendering call counts.
+
+Usage: python UIBenchmark.py script.txt [--output results.json]
+       python UIBenchmark.py --random-game 200 [--seed 1] [--save-script long_game.txt]
+
+Script format (one action per line, '#' starts a comment):
+    color white|black    picks a side on the start screen
+    click e2             clicks a board square (from the chosen side's point of view)
+    click 760 20         clicks a pixel position
+    move e7e8q           clicks the 'from' and 'to' squares, then presses the promotion key if one is given
+    key up|down|q|r|b|n  presses a key
+    idle 10              runs frames with no input'''
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import io
+import json
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')     # pygame's import banner would precede the JSON on stdout.
+
+import pygame
+import ChessObjects as co
+import main as gameWindow
+
+boardLength = 704       # Must match the layout in main.py.
+squareLength = boardLength // 8
+windowHeight = boardLength
+windowLength = boardLength + 120
+
+keyMap = {'up': pygame.K_UP, 'down': pygame.K_DOWN, 'q': pygame.K_q, 'r': pygame.K_r, 'b': pygame.K_b,
+          'n': pygame.K_n, 'escape': pygame.K_ESCAPE}
+
+def squareCenter(position, colorPOV):
+    '''Takes a board position (eg. 'e2') and the side the board is viewed from, and returns its pixel center.'''
+    fileMultiplier = ord(position[0]) - 97
+    rank = int(position[1])
+    if colorPOV == 'black':
+        x = boardLength - ((fileMultiplier + 1) * squareLength)
+        y = (rank - 1) * squareLength
+    else:
+        x = fileMultiplier * squareLength
+        y = boardLength - (rank * squareLength)
+    return x + squareLength // 2, y + squareLength // 2
+
+def clickEvent(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos = pos, button = 1)
+
+def keyEvent(name):
+    return pygame.event.Event(pygame.KEYDOWN, key = keyMap[name])
+
+def parseScript(lines):
+    '''Takes the lines of a script and returns a list of frames, where each frame is a list of events to post.'''
+    frames = []
+    colorPOV = 'white'
+    for line in lines:
+        words = line.split('#')[0].split()
+        if words == []:
+            continue
+        action = words[0]
+        if action == 'color':
+            colorPOV = words[1]
+            x = windowLength // 4 if colorPOV == 'white' else (3 * windowLength) // 4
+            frames.append([clickEvent((x, windowHeight // 2))])
+        elif action == 'click' and len(words) == 3:
+            frames.append([clickEvent((int(words[1]), int(words[2])))])
+        elif action == 'click':
+            frames.append([clickEvent(squareCenter(words[1], colorPOV))])
+        elif action == 'move':
+            frames.append([clickEvent(squareCenter(words[1][:2], colorPOV))])
+            frames.append([clickEvent(squareCenter(words[1][2:4], colorPOV))])
+            if len(words[1]) > 4:
+                frames.append([keyEvent(words[1][4])])
+        elif action == 'key':
+            frames.append([keyEvent(words[1])])
+        elif action == 'idle':
+            frames.extend([] for frame in range(int(words[1])))
+        else:
+            raise ValueError(f'Unknown script action: {line.strip()}')
+    return frames
+
+def randomGameScript(plies, seed = 1):
+    '''Plays a reproducible random game of up to 'plies' moves (preferring promotions, so that they are exercised)
+    and returns it as script lines, scrolling the move list up and down as the game gets long (including while a
+    promotion waits for its piece key).'''
+    randomGenerator = random.Random(seed)
+    game = co.chessGame(co.Board('standard'))
+    lines = ['color white']
+    with contextlib.redirect_stdout(io.StringIO()):     # chessGame prints the result when the game ends.
+        while len(game.movesList) < plies and game.resultType is None:
+            lastMove = game.movesObjects[-1] if game.movesObjects != [] else None
+            moves = co.legalMoves(game.board, game.toMove, lastMove)
+            promotions = [move for move in moves if len(move) > 4]
+            move = randomGenerator.choice(promotions if promotions else moves)
+            if len(move) > 4 and len(game.movesList) > 58:
+                # Scroll the long move list while the promotion is pending, before choosing the piece.
+                lines.extend([f'move {move[:4]}', 'key up', 'key down', f'key {move[4]}'])
+            else:
+                lines.append(f'move {move}')
+            game.move(move)
+            if len(game.movesList) % 40 == 0:
+                lines.extend(['key up'] * 5 + ['key down'] * 5)
+    lines.append('idle 10')
+    return lines
+
+def percentile(sortedValues, fraction):
+    if sortedValues == []:
+        return None
+    return sortedValues[min(len(sortedValues) - 1, int(fraction * len(sortedValues)))]
+
+def frameStats(frameTimes):
+    '''Takes a list of frame times in seconds and returns a dict of summary statistics in milliseconds.'''
+    sortedTimes = sorted(frameTimes)
+    return {
+        'frames': len(frameTimes),
+        'meanMs': round(1000 * sum(frameTimes) / len(frameTimes), 3) if frameTimes else None,
+        'p50Ms': round(1000 * percentile(sortedTimes, 0.50), 3) if frameTimes else None,
+        'p95Ms': round(1000 * percentile(sortedTimes, 0.95), 3) if frameTimes else None,
+        'p99Ms': round(1000 * percentile(sortedTimes, 0.99), 3) if frameTimes else None,
+        'maxMs': round(1000 * sortedTimes[-1], 3) if frameTimes else None,
+    }
+
+def runBenchmark(frames):
+    '''Replays the scripted frames through main.main() and returns a dict of frame-time and render-call statistics.'''
+    counts = collections.Counter()
+    frameRecords = []   # (seconds, render calls) per frame
+
+    originalRect = pygame.draw.rect
+    originalFont = pygame.font.Font
+    originalSetMode = pygame.display.set_mode
+
+    def countingRect(*args, **kwargs):
+        counts['draw.rect'] += 1
+        return originalRect(*args, **kwargs)
+
+    class CountingFont(originalFont):
+        def render(self, *args, **kwargs):
+            counts['font.render'] += 1
+            return super().render(*args, **kwargs)
+
+    class CountingSurface(pygame.Surface):
+        def blit(self, *args, **kwargs):
+            counts['blit'] += 1
+            return super().blit(*args, **kwargs)
+
+    def countingSetMode(size, *args, **kwargs):
+        originalSetMode(size, *args, **kwargs)
+        return CountingSurface(size)    # The dummy display is never shown, so draw onto a counting surface instead.
+
+    pending = collections.deque(frames)
+    lastTime = [None]
+    lastCounts = [collections.Counter()]
+
+    def onFrame():
+        now = time.perf_counter()
+        if lastTime[0] is not None:
+            frameCalls = counts - lastCounts[0]
+            frameRecords.append((now - lastTime[0], dict(frameCalls)))
+        lastCounts[0] = counts.copy()
+        if not pending:
+            return False
+        for event in pending.popleft():
+            pygame.event.post(event)
+        lastTime[0] = time.perf_counter()
+        return True
+
+    workingDirectory = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))     # main.py loads CONDFONT.TTF from the working directory.
+    pygame.draw.rect = countingRect
+    pygame.font.Font = CountingFont
+    pygame.display.set_mode = countingSetMode
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):     # Keep game messages out of the JSON written to stdout.
+            asyncio.run(gameWindow.main(frameCallback = onFrame, fps = 0))
+    finally:
+        os.chdir(workingDirectory)
+        pygame.draw.rect = originalRect
+        pygame.font.Font = originalFont
+        pygame.display.set_mode = originalSetMode
+        pygame.quit()
+
+    frameTimes = [record[0] for record in frameRecords]
+    totals = collections.Counter()
+    for record in frameRecords:
+        totals.update(record[1])
+
+    # Frame times across the game, in tenths of the script, to show whether frame cost grows with game length.
+    segments = []
+    segmentLength = max(1, len(frameTimes) // 10)
+    for start in range(0, len(frameTimes), segmentLength):
+        segmentStats = frameStats(frameTimes[start:start + segmentLength])
+        segments.append({'firstFrame': start, 'p50Ms': segmentStats['p50Ms'], 'p95Ms': segmentStats['p95Ms']})
+
+    return {
+        'frameTimes': frameStats(frameTimes),
+        'renderCallsPerFrame': {name: round(total / len(frameRecords), 2) for name, total in sorted(totals.items())} if frameRecords else {},
+        'renderCallsTotal': dict(sorted(totals.items())),
+        'frameTimesOverScript': segments,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Replay a scripted session of main.py headlessly and report frame times.')
+    parser.add_argument('script', nargs = '?', default = None, help = 'script file to replay')
+    parser.add_argument('--random-game', type = int, default = None, metavar = 'PLIES',
+                        help = 'generate a random game of this many plies instead of reading a script')
+    parser.add_argument('--seed', type = int, default = 1)
+    parser.add_argument('--save-script', default = None, help = 'write the generated script to this file')
+    parser.add_argument('--output', default = None, help = 'output file for the JSON results (default: stdout)')
+    args = parser.parse_args()
+
+    if args.script is not None:
+        with open(args.script) as scriptFile:
+            lines = scriptFile.readlines()
+    else:
+        lines = randomGameScript(args.random_game or 200, args.seed)
+        if args.save_script is not None:
+            with open(args.save_script, 'w') as scriptFile:
+                scriptFile.write('\n'.join(lines) + '\n')
+
+    results = runBenchmark(parseScript(lines))
+    output = json.dumps(results, indent = 2)
+    if args.output is not None:
+        with open(args.output, 'w') as outputFile:
+            outputFile.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
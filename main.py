@@ -4,7 +4,9 @@ import pygame
 import ChessObjects as co
 import asyncio
 
-async def main():
+async def main(frameCallback = None, fps = 30):
+    '''Runs the game window. 'frameCallback', if given, is called after every frame and stops the loop by returning False
+    (used by UIBenchmark.py to replay scripted input headlessly). 'fps' caps the frame rate (0 for uncapped).'''
     boardLength = 704
     sideBarWidth = 120
     windowLength = boardLength + sideBarWidth
@@ -16,6 +18,7 @@ async def main():
     game = co.chessGame(board)
 
     clickedSquare = None
+    legalDestinations = set()   # Squares the selected piece can move to, looked up once when it is selected.
     promotionWaiting = False
     scrollPosition: int = 28  # For scrolling through moves.
 
@@ -72,6 +75,17 @@ async def main():
     textContentDraw = 'Propose draw'
     textDraw = fontResignDraw.render(textContentDraw, True, 'black')
 
+    # Piece glyphs only need to be rendered once.
+    pieceMap = {'K': 'k', 'k': 'l', 'Q': 'q', 'q': 'w', 'R': 'r', 'r': 't', 'N': 'n', 'n': 'm',
+                'B': 'b',
+                'b': 'v', 'P': 'p', 'p': 'o'}
+    pieceGlyphs = {pieceStr: fontPieces.render(glyph, True, 'black') for pieceStr, glyph in pieceMap.items()}
+
+    # The move list is rebuilt only when a move is played or the game ends.
+    moveListKey = None
+    moveList = []
+    moveTextCache = {}
+
     pygame.draw.rect(screen, (255, 255, 255), playWhiteRect)
     pygame.draw.rect(screen, (0, 0, 0), playBlackRect)
     textRectWhite = textWhiteSelect.get_rect(center=playWhiteRect.center)
@@ -97,12 +111,13 @@ async def main():
             elif colorPOV =='black':
                 rectanglePairs = rectanglePairsBlackPOV
 
+            kingInCheck = co.isCheck(game.board, game.toMove)
             for thisSquare in rectanglePairs:
                 thisSquareRect = thisSquare[0]
                 thisSquareObj = thisSquare[1]
                 if clickedSquare == f'{thisSquareObj.getFileRank()}':
                     pygame.draw.rect(screen, (190, 190, 0), thisSquareRect)
-                elif co.isCheck(game.board, game.toMove) and (isinstance(thisSquareObj.getOccupyingPiece(),
+                elif kingInCheck and (isinstance(thisSquareObj.getOccupyingPiece(),
                                                                          co.King) and thisSquareObj.getOccupyingPiece().getColor() == game.toMove):
                     pygame.draw.rect(screen, (190, 0, 0), thisSquareRect)
                 elif thisSquare[1].getColor() == 'light':
@@ -110,14 +125,17 @@ async def main():
                 else:
                     pygame.draw.rect(screen, (130, 65, 0), thisSquareRect)
 
+                # Mark the squares the selected piece can move to.
+                if clickedSquare is not None and thisSquareObj.getFileRank() in legalDestinations:
+                    if thisSquareObj.getOccupyingPiece() is None:
+                        pygame.draw.circle(screen, (190, 190, 0), thisSquareRect.center, squareLength // 6)
+                    else:
+                        pygame.draw.circle(screen, (190, 190, 0), thisSquareRect.center, squareLength // 2 - 2, 5)
+
                 # Add piece symbols to squares.
                 if thisSquareObj.getOccupyingPiece() is not None:
-                    pieceMap = {'K': 'k', 'k': 'l', 'Q': 'q', 'q': 'w', 'R': 'r', 'r': 't', 'N': 'n', 'n': 'm',
-                                'B': 'b',
-                                'b': 'v', 'P': 'p', 'p': 'o'}
                     pieceStr = f'{thisSquareObj.getOccupyingPiece()}'
-                    textContent = pieceMap[pieceStr]
-                    text = fontPieces.render(textContent, True, 'black')
+                    text = pieceGlyphs[pieceStr]
                     textRect = text.get_rect(center=thisSquareRect.center)
                     screen.blit(text, textRect)
 
@@ -149,14 +167,16 @@ async def main():
             moveListRect = pygame.Rect((boardLength, moveListTop, sideBarWidth, moveListHeight))
             pygame.draw.rect(screen, (75, 75, 100), moveListRect)
 
-            moveList = game.getMoves().split('\n')
-            try:
-                moveList.remove('')
-            except:
-                pass
-            if game.resultType is not None:
-                moveList.append(f'{game.scoreWhite}-{game.scoreBlack} by')
-                moveList.append(f'{game.resultType}')
+            if moveListKey != (len(game.movesList), game.resultType):
+                moveListKey = (len(game.movesList), game.resultType)
+                moveList = game.getMoves().split('\n')
+                try:
+                    moveList.remove('')
+                except:
+                    pass
+                if game.resultType is not None:
+                    moveList.append(f'{game.scoreWhite}-{game.scoreBlack} by')
+                    moveList.append(f'{game.resultType}')
             if len(moveList) > 28:
                 endIndex = 28 - scrollPosition
                 moveListDisplayed = moveList[-scrollPosition:endIndex] if scrollPosition >= 29 else moveList[-scrollPosition:]
@@ -165,7 +185,9 @@ async def main():
 
             for index, move in enumerate(moveListDisplayed):
                 textContent = move
-                text = fontMoves.render(textContent, True, 'black')
+                if textContent not in moveTextCache:
+                    moveTextCache[textContent] = fontMoves.render(textContent, True, 'black')
+                text = moveTextCache[textContent]
 
                 centerIndex = (len(moveListDisplayed) - 1) / 2
                 indexDistance = index - centerIndex
@@ -189,7 +211,7 @@ async def main():
 
             elif colorPOV is None:
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_x, mouse_y = pygame.mouse.get_pos()
+                    mouse_x, mouse_y = event.pos
                     if textRectWhite.collidepoint(mouse_x, mouse_y):
                         colorPOV = 'white'
                         break
@@ -199,21 +221,26 @@ async def main():
 
             else:
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_x, mouse_y = pygame.mouse.get_pos()
+                    mouse_x, mouse_y = event.pos
 
                     for pair in rectanglePairs:
                         if pair[0].collidepoint(mouse_x, mouse_y):
                             if clickedSquare is None:
-                                if pair[1].getOccupyingPiece() is not None:
+                                if pair[1].getOccupyingPiece() is not None and pair[1].getOccupyingPiece().getColor() == game.toMove:
                                     clickedSquare = f'{pair[1].getFileRank()}'
+                                    legalDestinations = game.getLegalDestinations(clickedSquare)
                             else:
                                 moveToSquare = f'{pair[1].getFileRank()}'
-                                if isinstance(board.accessSquare(clickedSquare).getOccupyingPiece(), co.Pawn) and \
+                                if moveToSquare not in legalDestinations:   # Illegal target: drop the selection.
+                                    clickedSquare = None
+                                    legalDestinations = set()
+                                elif isinstance(board.accessSquare(clickedSquare).getOccupyingPiece(), co.Pawn) and \
                                         moveToSquare[1] in ['1', '8']:
                                     promotionWaiting = True
                                 else:
                                     game.move(f'{clickedSquare}{moveToSquare}')
                                     clickedSquare = None
+                                    legalDestinations = set()
                             eventBreak = True
                             break
                     if eventBreak:
@@ -239,12 +266,13 @@ async def main():
                         break
 
                 elif event.type == pygame.KEYDOWN:
-                    if len(moveList) > 28:
+                    if len(moveList) > 28 and event.key in [pygame.K_DOWN, pygame.K_UP]:
                         if event.key == pygame.K_DOWN:
                             scrollPosition = scrollPosition - 1 if scrollPosition > 29 else 28
                         elif event.key == pygame.K_UP:
                             scrollPosition = scrollPosition + 1 if scrollPosition < len(moveList) else len(moveList)
                     else:
+                        promotionChoice = None     # Only a promotion key pressed in this event completes a promotion.
                         if event.key == pygame.K_q:
                             promotionChoice = 'q'
                         elif event.key == pygame.K_r:
@@ -255,18 +283,23 @@ async def main():
                             promotionChoice = 'n'
                         else:
                             clickedSquare = None
+                            legalDestinations = set()
                             moveToSquare = None
                             promotionWaiting = False
 
-                    if promotionWaiting:
-                        game.move(f'{clickedSquare}{moveToSquare}{promotionChoice}')
-                        clickedSquare = None
-                        promotionWaiting = False
+                        if promotionWaiting and promotionChoice is not None:
+                            game.move(f'{clickedSquare}{moveToSquare}{promotionChoice}')
+                            clickedSquare = None
+                            legalDestinations = set()
+                            promotionWaiting = False
 
-        clock.tick(30)
+        clock.tick(fps)
         pygame.display.update()
+        if frameCallback is not None and frameCallback() is False:
+            return
         await asyncio.sleep(0)
 
-asyncio.run(main())
+if __name__ == '__main__':
+    asyncio.run(main())
 
 # Chess unicode font found at https://www.fonts4free.net/chess-condal-font.html
\ No newline at end of file